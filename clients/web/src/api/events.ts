@@ -18,4 +18,8 @@ export async function fetchEvent(id: string): Promise<EventData> {
 
 export function getImageUrl(s3Key: string): string {
   return `${API_BASE}/api/v1/files/${s3Key}`;
+}
+
+export function getAnnotatedImageUrl(eventId: string): string {
+  return `${API_BASE}/api/v1/events/${eventId}/annotated_frame`;
 }
\ No newline at end of file
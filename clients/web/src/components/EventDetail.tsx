@@ -1,6 +1,6 @@
 import { useState } from 'react';
 import type { EventData } from '../types/event';
-import { getImageUrl } from '../api/events';
+import { getAnnotatedImageUrl, getImageUrl } from '../api/events';
 import './EventDetail.css';
 
 interface EventDetailProps {
@@ -23,6 +23,9 @@ export function EventDetail({ event, onClose }: EventDetailProps) {
             <p><strong>Time:</strong> {new Date(event.timestamp).toLocaleString()}</p>
             <p><strong>Type:</strong> {event.event_type}</p>
             <p><strong>Entity ID:</strong> {event.entity_id}</p>
+            {event.track_id != null && (
+              <p><strong>Track ID:</strong> {event.track_id}</p>
+            )}
           </div>
           <div className="event-detail-images">
             <div className="event-detail-image-container">
@@ -36,9 +39,9 @@ export function EventDetail({ event, onClose }: EventDetailProps) {
             <div className="event-detail-image-container">
               <h3>Annotated Frame</h3>
               <img
-                src={getImageUrl(event.annotated_frame_s3_key)}
+                src={getAnnotatedImageUrl(event.id)}
                 alt="Annotated frame"
-                onClick={() => setLightboxImage(getImageUrl(event.annotated_frame_s3_key))}
+                onClick={() => setLightboxImage(getAnnotatedImageUrl(event.id))}
               />
             </div>
           </div>
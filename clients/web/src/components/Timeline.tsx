@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react';
 import type { EventData } from '../types/event';
-import { fetchEvents, getImageUrl } from '../api/events';
+import { fetchEvents, getAnnotatedImageUrl } from '../api/events';
 import './Timeline.css';
 
 interface TimelineProps {
@@ -43,7 +43,7 @@ export function Timeline({ onEventClick }: TimelineProps) {
             <div className="timeline-thumbnail-wrapper">
               <img
                 className="timeline-thumbnail"
-                src={getImageUrl(event.annotated_frame_s3_key)}
+                src={getAnnotatedImageUrl(event.id)}
                 alt={`${event.name} ${event.event_type}`}
               />
               <div className="timeline-status">detected</div>
@@ -1,3 +1,12 @@
+export type DetectionBox = {
+  name: string;
+  class_id: number;
+  confidence: number;
+  // Frame-relative [0, 1] coordinates
+  xyxy: [number, number, number, number];
+  track_id: number | null;
+}
+
 export type EventData = {
   id: string;
   entity_id: number;
@@ -5,5 +14,7 @@ export type EventData = {
   event_type: string;
   timestamp: string;
   raw_frame_s3_key: string;
-  annotated_frame_s3_key: string;
+  annotated_frame_s3_key: string | null;
+  track_id: number | null;
+  detections: DetectionBox[] | null;
 }
\ No newline at end of file
@@ -8,7 +8,7 @@ from fastapi import FastAPI
 
 from schrodinger.api import router
 from schrodinger.config import settings
-from schrodinger.detection.tasks import detect_object
+from schrodinger.detection.tasks import detect_object, run_local_pipeline
 from schrodinger.health.endpoints import router as health_router
 from schrodinger.kit.cors import CORSConfig, Scope, CORSMatcherMiddleware
 from schrodinger.kit.db.postgres import (
@@ -107,10 +107,14 @@ async def lifespan(app: FastAPI) -> AsyncIterator[State]:
 
     log.debug("Stream used", rtsp_stream_name=settings.RTSP_STREAM_NAME)
 
-    task_ids = [fetch_frames.delay(rtsp_url)]
-    log.info("Started fetch_frames task", id=task_ids[-1].id)
-    task_ids.append(detect_object.delay())
-    log.info("Started detect_object task", id=task_ids[-1].id)
+    if settings.PIPELINE_MODE == "local":
+        task_ids = [run_local_pipeline.delay(rtsp_url)]
+        log.info("Started run_local_pipeline task", id=task_ids[-1].id)
+    else:
+        task_ids = [fetch_frames.delay(rtsp_url)]
+        log.info("Started fetch_frames task", id=task_ids[-1].id)
+        task_ids.append(detect_object.delay())
+        log.info("Started detect_object task", id=task_ids[-1].id)
 
     log.info("Schrodinger API started")
 
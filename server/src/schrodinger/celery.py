@@ -1,9 +1,20 @@
+from dataclasses import asdict
+
+import structlog
 from celery import Celery
-from celery.signals import worker_init
+from celery.signals import worker_init, worker_process_init
+from celery.utils.log import get_task_logger
 
 from schrodinger.config import settings
 from schrodinger.logfire import configure_logfire
+from schrodinger.logging import Logger
 from schrodinger.logging import configure as configure_logging
+from schrodinger.worker.cpu import configure_blas_threads, configure_cpu
+
+log: Logger = structlog.wrap_logger(get_task_logger(__name__))
+
+# Before the task modules load numpy and torch
+configure_blas_threads()
 
 
 @worker_init.connect(weak=False)
@@ -11,6 +22,21 @@ def init_worker(*args, **kwargs):
     configure_logfire("worker")
     configure_logging(logfire=True)
 
+    if settings.WORKER_PRELOAD_MODELS:
+        from schrodinger.detection.warmup import preload_models
+
+        # Pool processes forked from here share the loaded weights
+        try:
+            preload_models()
+        except Exception as e:
+            log.error("Could not preload detection models", error=e)
+
+
+@worker_process_init.connect(weak=False)
+def init_worker_process(*args, **kwargs):
+    # Sent in every process running tasks, whatever the pool
+    log.info("Configured worker CPU", **asdict(configure_cpu()))
+
 
 celery = Celery(  # pyright: ignore [reportCallIssue]
     "celery",
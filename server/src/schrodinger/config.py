@@ -1,8 +1,8 @@
 import os
 from enum import StrEnum
-from typing import Literal
+from typing import Literal, Self
 
-from pydantic import PostgresDsn
+from pydantic import PostgresDsn, model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -42,6 +42,142 @@ class Settings(BaseSettings):
     RTSP_PORT: str = ""
     RTSP_STREAM_NAME: str = ""
 
+    # Frames are scaled down by FFmpeg at decode time to fit within these
+    # bounds, keeping the aspect ratio (0 leaves a side unconstrained). The
+    # default matches the 640px input of the YOLO models.
+    STREAM_INGEST_WIDTH: int = 640
+    STREAM_INGEST_HEIGHT: int = 640
+    STREAM_PIXEL_FORMAT: Literal["bgr24", "rgb24", "gray"] = "bgr24"
+    # Ingest frame rate, lowered to STREAM_FPS_MIN after STREAM_IDLE_AFTER
+    # seconds without activity or when inference cannot keep up, and raised
+    # again as soon as the detector reports activity.
+    STREAM_FPS_MAX: int = 10
+    STREAM_FPS_MIN: int = 2
+    STREAM_IDLE_AFTER: float = 30.0
+    STREAM_FPS_MIN_CHANGE_INTERVAL: float = 15.0
+    # Only decode keyframes after this many idle seconds (0 disables)
+    STREAM_KEYFRAMES_ONLY_AFTER: float = 300.0
+
+    # `distributed` decodes in fetch_frames and detects in detect_object, which
+    # may run on different workers; `local` runs both in a single process with
+    # frames handed over in memory.
+    PIPELINE_MODE: Literal["distributed", "local"] = "distributed"
+    # Frame source of the local pipeline: an FFmpeg rawvideo pipe, or OpenCV
+    # which skips converting the frames the detector is too busy to look at
+    STREAM_SOURCE: Literal["ffmpeg", "opencv"] = "ffmpeg"
+
+    # Frame transport between fetch_frames and detect_object. `shared_memory`
+    # requires both tasks to run on the same host, each camera's frames go
+    # through their own FRAME_RING_NAME-prefixed segment.
+    FRAME_TRANSPORT: Literal["redis", "shared_memory"] = "redis"
+    FRAME_RING_NAME: str = "schrodinger-frames"
+    FRAME_RING_SLOTS: int = 4
+    # Payload compression of frames sent inline through Redis. `lz4` requires
+    # the `lz4` package; `jpeg` is lossy but the smallest across hosts.
+    FRAME_CODEC_COMPRESSION: Literal["none", "jpeg", "lz4"] = "none"
+    FRAME_CODEC_JPEG_QUALITY: int = 90
+
+    # Motion gate skipping inference when the scene is static. A frame is
+    # inferred when at least MOTION_GATE_SENSITIVITY of its downsampled pixels
+    # changed, and at least every MOTION_GATE_FORCE_INTERVAL seconds anyway.
+    MOTION_GATE_ENABLED: bool = True
+    MOTION_GATE_METHOD: Literal["diff", "mog2"] = "diff"
+    MOTION_GATE_WIDTH: int = 64
+    MOTION_GATE_PIXEL_THRESHOLD: int = 25
+    MOTION_GATE_SENSITIVITY: float = 0.005
+    MOTION_GATE_FORCE_INTERVAL: float = 5.0
+
+    # Batched inference: up to DETECTION_BATCH_SIZE frames queued within
+    # DETECTION_BATCH_TIMEOUT_MS go through a single forward pass (1 disables).
+    # The Redis frame stream then keeps one batch of backlog, so the shared
+    # memory ring must have at least as many slots.
+    DETECTION_BATCH_SIZE: int = 1
+    DETECTION_BATCH_TIMEOUT_MS: int = 20
+    # Inference backend. `onnx` exports the weights once to data/cache (this
+    # needs the `onnx` and `onnxruntime` packages) and falls back to `torch`
+    # when the export's detections do not match. `onnx_int8` loads the model
+    # produced by the quantize_model task, calibrated on up to
+    # DETECTION_QUANTIZATION_FRAMES stored event frames. Frames are
+    # letterboxed to DETECTION_INPUT_SIZE pixels squares.
+    DETECTION_BACKEND: Literal["torch", "onnx", "onnx_int8"] = "torch"
+    DETECTION_QUANTIZATION_FRAMES: int = 500
+    DETECTION_INPUT_SIZE: int = 640
+    # JSON list of the COCO classes to watch, named as in CocoClassName
+    DETECTION_WATCHLIST: list[str] = ["cup"]
+    # JSON object of regions of interest per camera id (host:port/path of the
+    # RTSP URL), each a list of polygons in frame-relative [0, 1] coordinates.
+    # Inference only runs on the bounding region of a camera's polygons, with
+    # everything outside of them masked out.
+    DETECTION_ROIS: dict[str, list[list[tuple[float, float]]]] = {}
+    # YOLO11 weights in data/ used for detection
+    DETECTION_MODEL: Literal["yolo11n", "yolo11s", "yolo11m", "yolo11l", "yolo11x"] = (
+        "yolo11l"
+    )
+    # Cascade running DETECTION_CASCADE_SMALL_MODEL on every frame and
+    # DETECTION_MODEL only when the watched class is found with a borderline
+    # confidence in [LOW, HIGH), and every VALIDATION_INTERVAL seconds to check
+    # the small model against the large one (0 disables validation).
+    DETECTION_CASCADE_ENABLED: bool = False
+    DETECTION_CASCADE_SMALL_MODEL: Literal[
+        "yolo11n", "yolo11s", "yolo11m", "yolo11l", "yolo11x"
+    ] = "yolo11n"
+    DETECTION_CASCADE_BORDERLINE_LOW: float = 0.25
+    DETECTION_CASCADE_BORDERLINE_HIGH: float = 0.7
+    DETECTION_CASCADE_VALIDATION_INTERVAL: float = 30.0
+
+    # Tracker carrying object identities across frames. The detector runs on
+    # every TRACKING_DETECT_EVERY-th frame, or on the next one while a track
+    # was missed or is below TRACKING_UNCERTAIN_CONFIDENCE, and boxes are
+    # propagated in between. A track, and with it the presence of its entity,
+    # survives TRACKING_MAX_MISSES detector runs without a match.
+    TRACKING_ENABLED: bool = False
+    TRACKING_DETECT_EVERY: int = 3
+    TRACKING_IOU_THRESHOLD: float = 0.3
+    TRACKING_UNCERTAIN_CONFIDENCE: float = 0.6
+    TRACKING_LOW_CONFIDENCE: float = 0.25
+    TRACKING_MAX_MISSES: int = 2
+    TRACKING_MIN_HITS: int = 1
+
+    # Events are saved (frame encoding, S3 uploads, database commit) by
+    # EVENT_SINK_WORKERS background threads. When EVENT_SINK_MAX_PENDING events
+    # are already waiting, the detector waits up to EVENT_SINK_ENQUEUE_TIMEOUT
+    # seconds and then drops the event. Failed saves are retried
+    # EVENT_SINK_MAX_RETRIES times, with a backoff doubling from
+    # EVENT_SINK_RETRY_BACKOFF seconds.
+    EVENT_SINK_WORKERS: int = 2
+    EVENT_SINK_MAX_PENDING: int = 32
+    EVENT_SINK_ENQUEUE_TIMEOUT: float = 0.5
+    EVENT_SINK_MAX_RETRIES: int = 3
+    EVENT_SINK_RETRY_BACKOFF: float = 1.0
+    # Image format of the event frames stored on S3, encoded on the event sink
+    # threads. EVENT_IMAGE_QUALITY (1-100) applies to JPEG and WebP,
+    # EVENT_IMAGE_PNG_COMPRESSION (0-9) to PNG.
+    EVENT_IMAGE_FORMAT: Literal["png", "jpeg", "webp"] = "jpeg"
+    EVENT_IMAGE_QUALITY: int = 90
+    EVENT_IMAGE_PNG_COMPRESSION: int = 1
+    # Annotated event frames are rendered by the API when requested, the last
+    # EVENT_ANNOTATION_CACHE_SIZE of them are kept in memory. Browsers cache
+    # them for EVENT_ANNOTATION_MAX_AGE seconds, events never change.
+    EVENT_ANNOTATION_CACHE_SIZE: int = 256
+    EVENT_ANNOTATION_MAX_AGE: int = 86400
+
+    # CPU threads of each worker process, 0 keeps the library default of one
+    # per core, which oversubscribes hosts running several workers or cameras.
+    # WORKER_BLAS_THREADS applies to OpenMP, OpenBLAS and MKL.
+    WORKER_TORCH_THREADS: int = 0
+    WORKER_TORCH_INTEROP_THREADS: int = 0
+    WORKER_OPENCV_THREADS: int = 0
+    WORKER_BLAS_THREADS: int = 0
+    # CPUs the worker processes and their FFmpeg decoders are pinned to, e.g.
+    # [0, 1, 2, 3] (empty leaves them unpinned). Linux only.
+    WORKER_CPU_AFFINITY: list[int] = []
+    FFMPEG_CPU_AFFINITY: list[int] = []
+    # Load the detection models when a worker starts, and run
+    # WORKER_WARMUP_ITERATIONS inferences on a blank frame when a process
+    # starts detecting. Can be disabled on capture-only workers.
+    WORKER_PRELOAD_MODELS: bool = True
+    WORKER_WARMUP_ITERATIONS: int = 3
+
     # Database
     POSTGRES_USER: str = "schrodinger"
     POSTGRES_PWD: str = "schrodinger"
@@ -92,6 +228,19 @@ class Settings(BaseSettings):
         extra="allow",
     )
 
+    @model_validator(mode="after")
+    def check_frame_ring_slots(self) -> Self:
+        # Frames of a batch would otherwise be overwritten before being read
+        if (
+            self.FRAME_TRANSPORT == "shared_memory"
+            and self.DETECTION_BATCH_SIZE > self.FRAME_RING_SLOTS
+        ):
+            raise ValueError(
+                "FRAME_RING_SLOTS must be at least DETECTION_BATCH_SIZE "
+                "with the shared_memory frame transport"
+            )
+        return self
+
     @property
     def redis_url(self) -> str:
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/{self.REDIS_DB}"
@@ -0,0 +1,42 @@
+"""
+Annotations of event frames, drawn from the detections stored with the event
+when the frame is viewed rather than stored as a second image.
+"""
+
+from collections.abc import Sequence
+
+import cv2
+import numpy as np
+
+from schrodinger.detection.detection import DetectionBox, scale_box
+
+
+def annotate_frame(frame: np.ndarray, boxes: Sequence[DetectionBox]) -> np.ndarray:
+    annotated_frame = frame.copy()
+    frame_size = (frame.shape[1], frame.shape[0])
+
+    for box in boxes:
+        x1, y1, x2, y2 = map(int, scale_box(box.xyxy, (1, 1), frame_size))
+
+        cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+
+        label = f"{box.name}: {box.confidence:.2f}"
+        label_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
+        cv2.rectangle(
+            annotated_frame,
+            (x1, y1 - label_size[1] - 10),
+            (x1 + label_size[0], y1),
+            (0, 255, 0),
+            -1,
+        )
+        cv2.putText(
+            annotated_frame,
+            label,
+            (x1, y1 - 5),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.6,
+            (0, 0, 0),
+            2,
+        )
+
+    return annotated_frame
@@ -0,0 +1,132 @@
+"""
+Registry of the event frames stored on S3.
+"""
+
+import hashlib
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+
+import numpy as np
+import structlog
+from celery.utils.log import get_task_logger
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from schrodinger.detection.encoding import ImageEncoder
+from schrodinger.integrations.aws.s3.service import S3Service
+from schrodinger.kit.db.postgres import SyncSessionMaker
+from schrodinger.logging import Logger
+from schrodinger.models import FrameAsset
+
+log: Logger = structlog.wrap_logger(get_task_logger(__name__))
+
+
+def frame_hash(frame: np.ndarray) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((frame.shape, frame.dtype.str)).encode())
+    digest.update(np.ascontiguousarray(frame).data)
+    return digest.hexdigest()
+
+
+@dataclass
+class FrameAssetStats:
+    uploaded: int = 0
+    # Events pointed at a frame that was already stored
+    reused: int = 0
+
+
+class FrameAssetRegistry:
+    """
+    Frames stored on S3 by the hash of their pixels, so a frame shown by
+    several events, such as the entered and left events of an entity, is
+    encoded and uploaded once.
+    """
+
+    def __init__(
+        self,
+        session_maker: SyncSessionMaker,
+        s3_service: S3Service,
+        encoder: ImageEncoder,
+    ):
+        self.session_maker = session_maker
+        self.s3_service = s3_service
+        self.encoder = encoder
+        self.stats = FrameAssetStats()
+
+        self._lock = threading.Lock()
+        # Frames being stored, a concurrent store of the same frame waits for
+        # them rather than uploading it again
+        self._storing: dict[str, Future[str]] = {}
+
+    def get(self, content_hash: str) -> str | None:
+        """
+        Returns the S3 key of a stored frame.
+        """
+        with self.session_maker() as session:
+            return session.scalar(
+                select(FrameAsset.s3_key).where(FrameAsset.content_hash == content_hash)
+            )
+
+    def store(
+        self, frame: np.ndarray, name: str, content_hash: str | None = None
+    ) -> str:
+        """
+        Returns the S3 key of `frame`, uploading it as `name` with the
+        encoder's extension unless it is already stored.
+        """
+        if content_hash is None:
+            content_hash = frame_hash(frame)
+
+        with self._lock:
+            if (storing := self._storing.get(content_hash)) is None:
+                self._storing[content_hash] = stored = Future()
+            else:
+                self.stats.reused += 1
+        if storing is not None:
+            return storing.result()
+
+        try:
+            if (s3_key := self.get(content_hash)) is None:
+                s3_key = self._upload(frame, name, content_hash)
+                uploaded = True
+            else:
+                uploaded = False
+        except Exception as e:
+            stored.set_exception(e)
+            raise
+        else:
+            stored.set_result(s3_key)
+            with self._lock:
+                if uploaded:
+                    self.stats.uploaded += 1
+                else:
+                    self.stats.reused += 1
+            return s3_key
+        finally:
+            with self._lock:
+                del self._storing[content_hash]
+
+    def _upload(self, frame: np.ndarray, name: str, content_hash: str) -> str:
+        image = self.encoder.encode(frame)
+        s3_key = f"{content_hash}/{name}{image.extension}"
+        self.s3_service.upload(image.data, s3_key, mime_type=image.mime_type)
+
+        try:
+            with self.session_maker() as session:
+                session.add(
+                    FrameAsset(
+                        content_hash=content_hash,
+                        s3_key=s3_key,
+                        mime_type=image.mime_type,
+                    )
+                )
+                session.commit()
+        except IntegrityError:
+            # Registered by another detector in the meantime
+            if (registered := self.get(content_hash)) is None:
+                raise
+            log.debug("Frame was stored concurrently", content_hash=content_hash)
+            return registered
+
+        return s3_key
@@ -0,0 +1,231 @@
+"""
+Inference backends for the bundled YOLO weights.
+
+`torch` runs the `.pt` checkpoints as they are. `onnx` runs them through ONNX
+Runtime: each checkpoint is exported once into a cache keyed by the weights
+hash and input size, and its detections are checked against the torch backend
+before it is used. `onnx_int8` runs the quantised variant of that export
+produced by `schrodinger.detection.quantization`.
+"""
+
+import fcntl
+import hashlib
+import json
+import shutil
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Literal
+
+import cv2
+import numpy as np
+import structlog
+from celery.utils.log import get_task_logger
+from ultralytics import YOLO
+from ultralytics.utils import ASSETS
+
+from schrodinger.config import settings
+from schrodinger.logging import Logger
+
+log: Logger = structlog.wrap_logger(get_task_logger(__name__))
+
+type InferenceBackend = Literal["torch", "onnx", "onnx_int8"]
+
+MODELS_DIR = Path("data")
+EXPORT_CACHE_DIR = MODELS_DIR / "cache"
+
+
+def weights_path(model: str) -> Path:
+    return MODELS_DIR / f"{model}.pt"
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise IoU between (N, 4) and (M, 4) xyxy boxes, as an (N, M) matrix.
+    """
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return intersection / (area_a[:, None] + area_b[None, :] - intersection + 1e-9)
+
+
+@dataclass
+class ParityReport:
+    frames: int = 0
+    # Detections of the reference backend above the confidence threshold
+    reference_detections: int = 0
+    # Those found by the candidate backend with the same class and a close box
+    matched: int = 0
+    min_iou: float = 1.0
+    max_confidence_delta: float = 0.0
+
+    def passed(self, min_iou: float = 0.9, max_confidence_delta: float = 0.05) -> bool:
+        return (
+            self.matched == self.reference_detections
+            and self.min_iou >= min_iou
+            and self.max_confidence_delta <= max_confidence_delta
+        )
+
+
+def check_parity(
+    reference: YOLO,
+    candidate: YOLO,
+    frames: list[np.ndarray],
+    imgsz: int = settings.DETECTION_INPUT_SIZE,
+    confidence_threshold: float = 0.5,
+) -> ParityReport:
+    """
+    Compares the detections of two backends of the same model on `frames`.
+
+    Every reference detection above `confidence_threshold` is matched with the
+    candidate detection of the same class it overlaps most; candidates are
+    looked for down to half that threshold, so a confidence straddling it is
+    reported as a delta rather than a miss.
+    """
+    report = ParityReport()
+    for frame in frames:
+        report.frames += 1
+        expected = reference(frame, imgsz=imgsz, verbose=False)[0].boxes.cpu().numpy()
+        actual = candidate(frame, imgsz=imgsz, verbose=False)[0].boxes.cpu().numpy()
+
+        expected_mask = expected.conf > confidence_threshold
+        actual_mask = actual.conf > confidence_threshold / 2
+        report.reference_detections += int(expected_mask.sum())
+        if not expected_mask.any() or not actual_mask.any():
+            continue
+
+        iou = box_iou(expected.xyxy[expected_mask], actual.xyxy[actual_mask])
+        iou[expected.cls[expected_mask][:, None] != actual.cls[actual_mask]] = 0
+        best = iou.argmax(axis=1)
+        best_iou = iou[np.arange(len(best)), best]
+        matched = best_iou > 0
+        report.matched += int(matched.sum())
+        if matched.any():
+            report.min_iou = min(report.min_iou, float(best_iou[matched].min()))
+            confidence_delta = np.abs(
+                expected.conf[expected_mask][matched]
+                - actual.conf[actual_mask][best][matched]
+            )
+            report.max_confidence_delta = max(
+                report.max_confidence_delta, float(confidence_delta.max())
+            )
+
+    return report
+
+
+def sample_frames() -> list[np.ndarray]:
+    return [cv2.imread(str(ASSETS / name)) for name in ("bus.jpg", "zidane.jpg")]
+
+
+def export_key(
+    model: str,
+    imgsz: int = settings.DETECTION_INPUT_SIZE,
+    dynamic: bool = settings.DETECTION_BATCH_SIZE > 1,
+) -> str:
+    weights = weights_path(model)
+    return f"{model}-{file_hash(weights)}-{imgsz}{'-dynamic' if dynamic else ''}"
+
+
+def int8_model_path(model: str, imgsz: int = settings.DETECTION_INPUT_SIZE) -> Path:
+    return EXPORT_CACHE_DIR / f"{export_key(model, imgsz)}-int8.onnx"
+
+
+def export_onnx(
+    model: str,
+    imgsz: int = settings.DETECTION_INPUT_SIZE,
+    dynamic: bool = settings.DETECTION_BATCH_SIZE > 1,
+) -> Path | None:
+    """
+    Returns the cached ONNX export of `model`, exporting it on the first call.
+
+    A batch dimension is only made dynamic when batched inference is enabled,
+    as static shapes let ONNX Runtime optimise more. Returns None when the
+    export does not match the torch backend's detections.
+    """
+    weights = weights_path(model)
+    key = export_key(model, imgsz, dynamic)
+    onnx_path = EXPORT_CACHE_DIR / f"{key}.onnx"
+    report_path = EXPORT_CACHE_DIR / f"{key}.parity.json"
+
+    EXPORT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # Several workers may start at once, only one of them exports
+    with (EXPORT_CACHE_DIR / f"{key}.lock").open("w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        if not onnx_path.exists():
+            log.info("Exporting model to ONNX", model=model, path=str(onnx_path))
+            exported = YOLO(weights).export(
+                format="onnx", imgsz=imgsz, dynamic=dynamic, verbose=False
+            )
+            shutil.move(exported, onnx_path)
+            report_path.unlink(missing_ok=True)
+
+        if report_path.exists():
+            report = ParityReport(**json.loads(report_path.read_text()))
+        else:
+            report = check_parity(
+                YOLO(weights), YOLO(onnx_path, task="detect"), sample_frames(), imgsz
+            )
+            report_path.write_text(json.dumps(asdict(report)))
+            log.info("Checked ONNX export against torch", model=model, report=report)
+
+    if not report.passed():
+        log.error("ONNX export does not match torch", model=model, report=report)
+        return None
+
+    return onnx_path
+
+
+# Models loaded when the worker started, shared by the detectors of a process
+_preloaded: dict[tuple[str, InferenceBackend], YOLO] = {}
+
+
+def preload_model(
+    model: str, backend: InferenceBackend = settings.DETECTION_BACKEND
+) -> YOLO:
+    """
+    Loads a model once for the process, later `load_model` calls return it.
+    """
+    backend = resolve_backend(model, backend)
+    if (loaded := _preloaded.get((model, backend))) is None:
+        _preloaded[(model, backend)] = loaded = _load_model(model, backend)
+    return loaded
+
+
+def load_model(
+    model: str, backend: InferenceBackend = settings.DETECTION_BACKEND
+) -> YOLO:
+    backend = resolve_backend(model, backend)
+    if (preloaded := _preloaded.get((model, backend))) is not None:
+        return preloaded
+    return _load_model(model, backend)
+
+
+def resolve_backend(model: str, backend: InferenceBackend) -> InferenceBackend:
+    """
+    Falls back from `onnx_int8` to `onnx` while the INT8 model is missing, so a
+    model preloaded in the meantime is cached under the backend it runs on.
+    """
+    if backend == "onnx_int8" and not int8_model_path(model).exists():
+        log.warning("No INT8 model, run the quantize_model task first", model=model)
+        return "onnx"
+    return backend
+
+
+def _load_model(model: str, backend: InferenceBackend) -> YOLO:
+    if backend == "onnx_int8":
+        return YOLO(int8_model_path(model), task="detect")
+
+    if backend == "onnx" and (onnx_path := export_onnx(model)) is not None:
+        return YOLO(onnx_path, task="detect")
+
+    return YOLO(weights_path(model))
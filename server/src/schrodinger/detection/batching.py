@@ -0,0 +1,115 @@
+"""
+Batched inference over frames coming from one or more streams.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+from schrodinger.config import settings
+from schrodinger.detection.detection import EntityDetector
+
+
+@dataclass
+class BatchResult:
+    stream: str
+    seq: int
+    result: Any
+
+
+@dataclass
+class _BatchItem:
+    stream: str
+    seq: int
+    frame: np.ndarray
+    future: Future[BatchResult] = field(default_factory=Future)
+
+
+@dataclass
+class InferenceBatcherStats:
+    batches: int = 0
+    frames: int = 0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.frames / self.batches if self.batches else 0.0
+
+
+class InferenceBatcher:
+    """
+    Collects frames until `max_batch_size` are queued or `max_wait` seconds
+    passed since the first one, then runs them in one forward pass.
+
+    Each submitted frame gets a future resolved with the result for its own
+    stream and sequence number.
+    """
+
+    def __init__(
+        self,
+        entity_detector: EntityDetector,
+        *,
+        max_batch_size: int = settings.DETECTION_BATCH_SIZE,
+        max_wait: float = settings.DETECTION_BATCH_TIMEOUT_MS / 1000,
+    ):
+        self.entity_detector = entity_detector
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.stats = InferenceBatcherStats()
+
+        self._queue: queue.Queue[_BatchItem | None] = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="InferenceBatcher", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, stream: str, seq: int, frame: np.ndarray) -> Future[BatchResult]:
+        item = _BatchItem(stream, seq, frame)
+        self._queue.put(item)
+        return item.future
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self) -> tuple[list[_BatchItem], bool]:
+        if (first := self._queue.get()) is None:
+            return [], True
+
+        items = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(items) < self.max_batch_size:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                return items, True
+            items.append(item)
+
+        return items, False
+
+    def _run(self) -> None:
+        closed = False
+        while not closed:
+            items, closed = self._collect()
+            if not items:
+                continue
+
+            try:
+                results = self.entity_detector.run_batch_inference(
+                    [item.frame for item in items]
+                )
+            except Exception as e:
+                for item in items:
+                    item.future.set_exception(e)
+                continue
+
+            self.stats.batches += 1
+            self.stats.frames += len(items)
+            for item, result in zip(items, results, strict=True):
+                item.future.set_result(BatchResult(item.stream, item.seq, result))
@@ -0,0 +1,131 @@
+"""
+Two-tier detector escalating from a small YOLO model to a larger one.
+"""
+
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import structlog
+from celery.utils.log import get_task_logger
+
+from schrodinger.config import settings
+from schrodinger.detection.detection import CocoClassId, EntityDetector
+from schrodinger.logging import Logger
+
+log: Logger = structlog.wrap_logger(get_task_logger(__name__))
+
+
+@dataclass
+class CascadeStats:
+    frames: int = 0
+    # Frames re-run on the large model because of a borderline confidence
+    borderline: int = 0
+    # Frames re-run on the large model to validate the small one, whether
+    # borderline or not
+    validations: int = 0
+    # Validations where the small model missed or hallucinated an entity
+    disagreements: int = 0
+    # Frames run on the large model for either reason
+    escalated: int = 0
+
+    @property
+    def escalation_ratio(self) -> float:
+        if not self.frames:
+            return 0.0
+        return self.escalated / self.frames
+
+
+class CascadeDetector(EntityDetector):
+    """
+    Runs the small model on every frame and the large one only when needed.
+
+    A frame is escalated when the small model's best confidence for any of the
+    watched classes is in [`borderline_low`, `borderline_high`): below, the
+    class is taken as absent and above, the small model's detection is kept. A
+    frame is also escalated every `validation_interval` seconds, which reports
+    how often both models disagree on which classes are present.
+    """
+
+    def __init__(
+        self,
+        class_ids: Sequence[CocoClassId],
+        *,
+        small_model: str = settings.DETECTION_CASCADE_SMALL_MODEL,
+        large_model: str = settings.DETECTION_MODEL,
+        borderline_low: float = settings.DETECTION_CASCADE_BORDERLINE_LOW,
+        borderline_high: float = settings.DETECTION_CASCADE_BORDERLINE_HIGH,
+        validation_interval: float = settings.DETECTION_CASCADE_VALIDATION_INTERVAL,
+        confidence_threshold: float = 0.5,
+    ):
+        super().__init__(small_model, classes=class_ids)
+        self.large_detector = EntityDetector(large_model, classes=class_ids)
+        self.class_ids = list(class_ids)
+        self.borderline_low = borderline_low
+        self.borderline_high = borderline_high
+        self.validation_interval = validation_interval
+        self.confidence_threshold = confidence_threshold
+        self.stats = CascadeStats()
+        self._validated_at = time.monotonic()
+
+    def _class_confidences(self, result) -> dict[int, float]:
+        best = self.extract_detections([result], self.class_ids, 0.0).best_per_class()
+        return dict(zip(best.class_ids.tolist(), best.confidences.tolist()))
+
+    def _present(self, confidences: dict[int, float]) -> set[int]:
+        return {
+            class_id
+            for class_id, confidence in confidences.items()
+            if confidence > self.confidence_threshold
+        }
+
+    def run_inference(self, frame):
+        return self.run_batch_inference([frame])
+
+    def run_batch_inference(self, frames: list) -> list:
+        results = super().run_batch_inference(frames)
+        self.stats.frames += len(frames)
+
+        confidences = [self._class_confidences(result) for result in results]
+        escalated = [
+            i
+            for i, class_confidences in enumerate(confidences)
+            if any(
+                self.borderline_low <= confidence < self.borderline_high
+                for confidence in class_confidences.values()
+            )
+        ]
+        self.stats.borderline += len(escalated)
+
+        validated = None
+        now = time.monotonic()
+        if (
+            self.validation_interval > 0
+            and now - self._validated_at >= self.validation_interval
+        ):
+            self._validated_at = now
+            self.stats.validations += 1
+            validated = len(frames) - 1
+            if validated not in escalated:
+                escalated.append(validated)
+
+        if not escalated:
+            return results
+
+        self.stats.escalated += len(escalated)
+        large_results = self.large_detector.run_batch_inference(
+            [frames[i] for i in escalated]
+        )
+        for i, large_result in zip(escalated, large_results, strict=True):
+            if i == validated:
+                large_confidences = self._class_confidences(large_result)
+                if self._present(confidences[i]) != self._present(large_confidences):
+                    self.stats.disagreements += 1
+                    log.info(
+                        "Cascade models disagree",
+                        small=confidences[i],
+                        large=large_confidences,
+                    )
+            results[i] = large_result
+
+        return results
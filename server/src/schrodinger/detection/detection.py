@@ -1,69 +1,377 @@
+from collections.abc import Sequence
+from dataclasses import dataclass
 from enum import IntEnum, StrEnum
-from typing import Any
 
-from pydantic import BaseModel
-from ultralytics import YOLO
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+
+from schrodinger.config import settings
+from schrodinger.detection.backends import InferenceBackend, load_model
 
 
 class CocoClassId(IntEnum):
     # https://github.com/ultralytics/ultralytics/blob/main/ultralytics/cfg/datasets/coco.yaml
     person = 0
+    bicycle = 1
+    car = 2
+    motorcycle = 3
+    airplane = 4
+    bus = 5
+    train = 6
+    truck = 7
+    boat = 8
+    traffic_light = 9
+    fire_hydrant = 10
+    stop_sign = 11
+    parking_meter = 12
+    bench = 13
+    bird = 14
     cat = 15
+    dog = 16
+    horse = 17
+    sheep = 18
+    cow = 19
+    elephant = 20
+    bear = 21
+    zebra = 22
+    giraffe = 23
+    backpack = 24
+    umbrella = 25
+    handbag = 26
+    tie = 27
+    suitcase = 28
+    frisbee = 29
+    skis = 30
+    snowboard = 31
+    sports_ball = 32
+    kite = 33
+    baseball_bat = 34
+    baseball_glove = 35
+    skateboard = 36
+    surfboard = 37
+    tennis_racket = 38
     bottle = 39
+    wine_glass = 40
     cup = 41
+    fork = 42
+    knife = 43
+    spoon = 44
+    bowl = 45
+    banana = 46
+    apple = 47
+    sandwich = 48
+    orange = 49
+    broccoli = 50
+    carrot = 51
+    hot_dog = 52
+    pizza = 53
+    donut = 54
+    cake = 55
+    chair = 56
     couch = 57
+    potted_plant = 58
+    bed = 59
     dining_table = 60
+    toilet = 61
+    tv = 62
     laptop = 63
+    mouse = 64
     remote = 65
+    keyboard = 66
     cell_phone = 67
+    microwave = 68
+    oven = 69
+    toaster = 70
+    sink = 71
+    refrigerator = 72
     book = 73
+    clock = 74
+    vase = 75
+    scissors = 76
+    teddy_bear = 77
+    hair_drier = 78
+    toothbrush = 79
 
 
 class CocoClassName(StrEnum):
     person = "person"
+    bicycle = "bicycle"
+    car = "car"
+    motorcycle = "motorcycle"
+    airplane = "airplane"
+    bus = "bus"
+    train = "train"
+    truck = "truck"
+    boat = "boat"
+    traffic_light = "traffic_light"
+    fire_hydrant = "fire_hydrant"
+    stop_sign = "stop_sign"
+    parking_meter = "parking_meter"
+    bench = "bench"
+    bird = "bird"
     cat = "cat"
+    dog = "dog"
+    horse = "horse"
+    sheep = "sheep"
+    cow = "cow"
+    elephant = "elephant"
+    bear = "bear"
+    zebra = "zebra"
+    giraffe = "giraffe"
+    backpack = "backpack"
+    umbrella = "umbrella"
+    handbag = "handbag"
+    tie = "tie"
+    suitcase = "suitcase"
+    frisbee = "frisbee"
+    skis = "skis"
+    snowboard = "snowboard"
+    sports_ball = "sports_ball"
+    kite = "kite"
+    baseball_bat = "baseball_bat"
+    baseball_glove = "baseball_glove"
+    skateboard = "skateboard"
+    surfboard = "surfboard"
+    tennis_racket = "tennis_racket"
     bottle = "bottle"
+    wine_glass = "wine_glass"
     cup = "cup"
+    fork = "fork"
+    knife = "knife"
+    spoon = "spoon"
+    bowl = "bowl"
+    banana = "banana"
+    apple = "apple"
+    sandwich = "sandwich"
+    orange = "orange"
+    broccoli = "broccoli"
+    carrot = "carrot"
+    hot_dog = "hot_dog"
+    pizza = "pizza"
+    donut = "donut"
+    cake = "cake"
+    chair = "chair"
     couch = "couch"
+    potted_plant = "potted_plant"
+    bed = "bed"
     dining_table = "dining_table"
+    toilet = "toilet"
+    tv = "tv"
     laptop = "laptop"
+    mouse = "mouse"
     remote = "remote"
+    keyboard = "keyboard"
     cell_phone = "cell_phone"
+    microwave = "microwave"
+    oven = "oven"
+    toaster = "toaster"
+    sink = "sink"
+    refrigerator = "refrigerator"
     book = "book"
+    clock = "clock"
+    vase = "vase"
+    scissors = "scissors"
+    teddy_bear = "teddy_bear"
+    hair_drier = "hair_drier"
+    toothbrush = "toothbrush"
+
+
+def get_watchlist() -> list[CocoClassId]:
+    return [CocoClassId[name] for name in settings.DETECTION_WATCHLIST]
+
+
+type Box = tuple[float, float, float, float]
+
+
+def scale_box(xyxy: Box, from_size: tuple[int, int], to_size: tuple[int, int]) -> Box:
+    """
+    Maps box coordinates between two (width, height) resolutions of a frame.
+    """
+    x_scale = to_size[0] / from_size[0]
+    y_scale = to_size[1] / from_size[1]
+    x1, y1, x2, y2 = xyxy
+    return (x1 * x_scale, y1 * y_scale, x2 * x_scale, y2 * y_scale)
 
 
 class DetectedEntity(BaseModel):
     name: CocoClassName
     class_id: CocoClassId
     confidence: float
-    box: Any
+    # Bounding box in the camera stream's original resolution
+    xyxy: Box
+    # Identity given by the tracker, when enabled
+    track_id: int | None = None
+
+
+class DetectionBox(BaseModel):
+    """
+    Detection stored with an event, the annotations being drawn from it when
+    the event frame is viewed.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    name: CocoClassName
+    class_id: CocoClassId
+    confidence: float
+    # Frame-relative [0, 1] coordinates, which hold at any stored resolution
+    xyxy: Box
+    track_id: int | None = None
+
+    @classmethod
+    def from_entity(
+        cls, entity: DetectedEntity, frame_size: tuple[int, int]
+    ) -> "DetectionBox":
+        """
+        `frame_size` is the (width, height) the entity's box is expressed in.
+        """
+        return cls(
+            name=entity.name,
+            class_id=entity.class_id,
+            confidence=entity.confidence,
+            xyxy=scale_box(entity.xyxy, frame_size, (1, 1)),
+            track_id=entity.track_id,
+        )
+
+
+@dataclass(frozen=True)
+class Detections:
+    """
+    Detections of a frame as parallel arrays, one row per box.
+    """
+
+    class_ids: np.ndarray  # (N,) int16
+    confidences: np.ndarray  # (N,) float32
+    xyxy: np.ndarray  # (N, 4) float32
+    track_ids: np.ndarray | None = None  # (N,) int32
+
+    def __len__(self) -> int:
+        return len(self.class_ids)
+
+    @classmethod
+    def concatenate(cls, detections: Sequence["Detections"]) -> "Detections":
+        if not detections:
+            return cls(
+                np.empty(0, np.int16),
+                np.empty(0, np.float32),
+                np.empty((0, 4), np.float32),
+            )
+        if len(detections) == 1:
+            return detections[0]
+        return cls(
+            np.concatenate([d.class_ids for d in detections], dtype=np.int16),
+            np.concatenate([d.confidences for d in detections], dtype=np.float32),
+            np.concatenate([d.xyxy for d in detections], dtype=np.float32).reshape(
+                -1, 4
+            ),
+        )
+
+    def best_per_class(self) -> "Detections":
+        """
+        Keeps the most confident detection of each class, ordered by class.
+        """
+        order = np.lexsort((-self.confidences, self.class_ids))
+        _, first = np.unique(self.class_ids[order], return_index=True)
+        return self.select(order[first])
+
+    def scaled(
+        self, from_size: tuple[int, int], to_size: tuple[int, int]
+    ) -> "Detections":
+        """
+        Maps the boxes between two (width, height) resolutions of a frame.
+        """
+        scale = np.tile(
+            np.float32((to_size[0] / from_size[0], to_size[1] / from_size[1])), 2
+        )
+        return Detections(
+            self.class_ids, self.confidences, self.xyxy * scale, self.track_ids
+        )
+
+    def select(self, index: np.ndarray) -> "Detections":
+        """
+        Subset of the detections for a boolean mask or an array of indices.
+        """
+        return Detections(
+            self.class_ids[index],
+            self.confidences[index],
+            self.xyxy[index],
+            self.track_ids[index] if self.track_ids is not None else None,
+        )
+
+    def entity(self, index: int) -> DetectedEntity:
+        class_id = CocoClassId(int(self.class_ids[index]))
+        return DetectedEntity(
+            name=CocoClassName[class_id.name],
+            class_id=class_id,
+            confidence=float(self.confidences[index]),
+            xyxy=tuple(self.xyxy[index].tolist()),
+            track_id=(
+                int(self.track_ids[index]) if self.track_ids is not None else None
+            ),
+        )
 
 
 class EntityDetector:
-    def __init__(self):
-        self.yolo_model = YOLO("data/yolo11l.pt")
+    def __init__(
+        self,
+        model: str = settings.DETECTION_MODEL,
+        backend: InferenceBackend = settings.DETECTION_BACKEND,
+        input_size: int = settings.DETECTION_INPUT_SIZE,
+        classes: Sequence[int] | None = None,
+    ):
+        self.model = model
+        self.input_size = input_size
+        # Classes kept by the model's NMS, all of them when None
+        self.classes = list(classes) if classes is not None else None
+        self.yolo_model = load_model(model, backend)
 
     def run_inference(self, frame):
         # Run YOLOv11 inference
-        return self.yolo_model(frame, verbose=False)
+        return self.yolo_model(
+            frame, imgsz=self.input_size, classes=self.classes, verbose=False
+        )
+
+    def run_batch_inference(self, frames: list) -> list:
+        """
+        Runs a single forward pass over several frames, one result per frame.
+        """
+        return self.yolo_model(
+            frames, imgsz=self.input_size, classes=self.classes, verbose=False
+        )
 
-    def process_inference_results(
-        self, results, entity_id: CocoClassId, confidence_threshold: float = 0.5
-    ) -> DetectedEntity | None:
+    def extract_detections(
+        self,
+        results,
+        class_ids: Sequence[int] | None = None,
+        confidence_threshold: float = 0.5,
+        source_size: tuple[int, int] | None = None,
+    ) -> Detections:
+        """
+        Keeps the detections of `class_ids` above `confidence_threshold`, with
+        boxes mapped to `source_size` when given.
+        """
+        detections = []
         for result in results:
-            boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    # Get class ID and confidence
-                    class_id = int(box.cls[0])
-                    confidence = float(box.conf[0])
-
-                    if class_id == entity_id and confidence > confidence_threshold:
-                        return DetectedEntity(
-                            name=CocoClassName[entity_id.name],
-                            class_id=entity_id,
-                            confidence=confidence,
-                            box=box,
-                        )
-
-        return None
+            if (boxes := result.boxes) is None or not len(boxes):
+                continue
+
+            # (N, 6) rows of x1, y1, x2, y2, confidence, class
+            data = boxes.cpu().numpy().data
+            mask = data[:, 4] > confidence_threshold
+            if class_ids is not None:
+                mask &= np.isin(data[:, 5], class_ids)
+            data = data[mask]
+
+            result_detections = Detections(
+                data[:, 5].astype(np.int16),
+                data[:, 4].astype(np.float32),
+                data[:, :4].astype(np.float32),
+            )
+            if source_size is not None:
+                height, width = result.orig_shape
+                result_detections = result_detections.scaled(
+                    (width, height), source_size
+                )
+            detections.append(result_detections)
+
+        return Detections.concatenate(detections)
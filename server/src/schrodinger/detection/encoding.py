@@ -0,0 +1,76 @@
+"""
+Encoding of event frames into the configured image format.
+"""
+
+from dataclasses import dataclass
+from typing import Literal
+
+import cv2
+import numpy as np
+
+from schrodinger.config import settings
+
+type ImageFormat = Literal["png", "jpeg", "webp"]
+
+# Extension and MIME type of each format
+IMAGE_FORMATS: dict[ImageFormat, tuple[str, str]] = {
+    "png": (".png", "image/png"),
+    "jpeg": (".jpg", "image/jpeg"),
+    "webp": (".webp", "image/webp"),
+}
+
+
+@dataclass(frozen=True)
+class EncodedImage:
+    data: bytes
+    extension: str
+    mime_type: str
+
+
+def encode_image(
+    frame: np.ndarray,
+    image_format: ImageFormat = settings.EVENT_IMAGE_FORMAT,
+    *,
+    quality: int = settings.EVENT_IMAGE_QUALITY,
+    png_compression: int = settings.EVENT_IMAGE_PNG_COMPRESSION,
+) -> EncodedImage:
+    extension, mime_type = IMAGE_FORMATS[image_format]
+    match image_format:
+        case "png":
+            params = [cv2.IMWRITE_PNG_COMPRESSION, png_compression]
+        case "jpeg":
+            params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        case "webp":
+            params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+
+    encoded, buffer = cv2.imencode(extension, frame, params)
+    if not encoded:
+        raise ValueError(f"Could not encode frame to {extension}")
+    return EncodedImage(buffer.tobytes(), extension, mime_type)
+
+
+class ImageEncoder:
+    """
+    Encodes frames in the configured format on the calling thread; OpenCV
+    releases the GIL while encoding, so the event sink threads encode several
+    frames in parallel.
+    """
+
+    def __init__(
+        self,
+        image_format: ImageFormat = settings.EVENT_IMAGE_FORMAT,
+        *,
+        quality: int = settings.EVENT_IMAGE_QUALITY,
+        png_compression: int = settings.EVENT_IMAGE_PNG_COMPRESSION,
+    ):
+        self.image_format = image_format
+        self.quality = quality
+        self.png_compression = png_compression
+
+    def encode(self, frame: np.ndarray) -> EncodedImage:
+        return encode_image(
+            frame,
+            self.image_format,
+            quality=self.quality,
+            png_compression=self.png_compression,
+        )
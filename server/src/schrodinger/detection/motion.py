@@ -0,0 +1,114 @@
+"""
+Cheap pre-inference gate skipping the detector on static frames.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Literal
+
+import cv2
+import numpy as np
+
+from schrodinger.config import settings
+
+type MotionGateMethod = Literal["diff", "mog2"]
+
+
+@dataclass
+class MotionGateStats:
+    frames: int = 0
+    skipped: int = 0
+    forced: int = 0
+
+    @property
+    def skip_ratio(self) -> float:
+        return self.skipped / self.frames if self.frames else 0.0
+
+
+class MotionGate:
+    """
+    Decides whether a frame changed enough to be worth a full inference.
+
+    Frames are downsampled to a small grayscale thumbnail and compared either
+    with the thumbnail of the last inferred frame (`diff`), so slow changes
+    accumulate until they trigger, or with a MOG2 background model (`mog2`).
+    An inference is forced at least every `force_interval` seconds so the
+    presence state never drifts for long.
+    """
+
+    def __init__(
+        self,
+        *,
+        method: MotionGateMethod = settings.MOTION_GATE_METHOD,
+        width: int = settings.MOTION_GATE_WIDTH,
+        pixel_threshold: int = settings.MOTION_GATE_PIXEL_THRESHOLD,
+        sensitivity: float = settings.MOTION_GATE_SENSITIVITY,
+        force_interval: float = settings.MOTION_GATE_FORCE_INTERVAL,
+    ):
+        self.method = method
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.sensitivity = sensitivity
+        self.force_interval = force_interval
+        self.stats = MotionGateStats()
+        self.last_motion_at = 0.0
+
+        self._reference: np.ndarray | None = None
+        self._last_inference_at = float("-inf")
+        self._subtractor = (
+            cv2.createBackgroundSubtractorMOG2(
+                varThreshold=pixel_threshold, detectShadows=False
+            )
+            if method == "mog2"
+            else None
+        )
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        height = max(1, round(frame.shape[0] * self.width / frame.shape[1]))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (3, 3), 0)
+
+    def changed_ratio(self, thumbnail: np.ndarray) -> float:
+        if self._subtractor is not None:
+            foreground = self._subtractor.apply(thumbnail)
+            return cv2.countNonZero(foreground) / foreground.size
+
+        if self._reference is None or self._reference.shape != thumbnail.shape:
+            return 1.0
+
+        diff = cv2.absdiff(thumbnail, self._reference)
+        return np.count_nonzero(diff > self.pixel_threshold) / diff.size
+
+    def should_infer(
+        self,
+        frame: np.ndarray,
+        timestamp: float,
+        confirm: Callable[[], bool] = lambda: True,
+    ) -> bool:
+        """
+        `confirm` is asked for a frame that passes the gate, and the frame
+        only becomes the reference when it agrees to run the inference.
+        """
+        self.stats.frames += 1
+        thumbnail = self._thumbnail(frame)
+
+        if self.changed_ratio(thumbnail) >= self.sensitivity:
+            self.last_motion_at = timestamp
+            infer = True
+        elif timestamp - self._last_inference_at >= self.force_interval:
+            self.stats.forced += 1
+            infer = True
+        else:
+            infer = False
+
+        if not infer:
+            self.stats.skipped += 1
+            return False
+        if not confirm():
+            return False
+
+        self._reference = thumbnail
+        self._last_inference_at = timestamp
+        return True
@@ -0,0 +1,88 @@
+"""
+Presence of the watched entities, kept in the detector process.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import structlog
+from celery.utils.log import get_task_logger
+from pydantic import BaseModel, ValidationError
+from redis import Redis, RedisError
+
+from schrodinger.detection.detection import DetectedEntity, DetectionBox
+from schrodinger.logging import Logger
+from schrodinger.redis import DETECTOR_PRESENCE_KEY
+
+log: Logger = structlog.wrap_logger(get_task_logger(__name__))
+
+
+@dataclass
+class PresenceEntry:
+    entity: DetectedEntity
+    # Frame of the entered event, reused for the left one; None when the
+    # entry was recovered from a checkpoint, which keeps its hash only
+    raw_frame: np.ndarray | None = None
+    box: DetectionBox | None = None
+    frame_hash: str | None = None
+
+
+class PresenceCheckpoint(BaseModel):
+    entity: DetectedEntity
+    box: DetectionBox | None = None
+    frame_hash: str | None = None
+
+
+class PresenceState:
+    """
+    Entities currently in frame, per class id.
+
+    Lookups never leave the process. The state is checkpointed to a Redis hash
+    on transitions only, before the matching event is saved, so a crash may
+    lose an event but never duplicates one. On restart the checkpoint is
+    restored: an entity still in frame does not enter again, and one that
+    left while the detector was down gets its left event on the first
+    processed frame.
+    """
+
+    def __init__(self, redis: Redis, key: str = DETECTOR_PRESENCE_KEY):
+        self.redis = redis
+        self.key = key
+        self.entries: dict[int, PresenceEntry] = {}
+
+    def restore(self) -> None:
+        """
+        Starts empty when the checkpoint cannot be read, the entities still in
+        frame then enter again rather than detection not starting at all.
+        """
+        self.entries = {}
+        try:
+            checkpoints = self.redis.hgetall(self.key)
+        except RedisError as e:
+            log.error("Could not restore presence", error=e)
+            return
+
+        for class_id, checkpoint in checkpoints.items():
+            try:
+                entry = PresenceCheckpoint.model_validate_json(checkpoint)
+            except ValidationError as e:
+                log.error("Could not restore presence", class_id=class_id, error=e)
+                continue
+            self.entries[int(class_id)] = PresenceEntry(
+                entry.entity, box=entry.box, frame_hash=entry.frame_hash
+            )
+
+    def __contains__(self, class_id: int) -> bool:
+        return class_id in self.entries
+
+    def enter(self, entry: PresenceEntry) -> None:
+        class_id = int(entry.entity.class_id)
+        checkpoint = PresenceCheckpoint(
+            entity=entry.entity, box=entry.box, frame_hash=entry.frame_hash
+        )
+        self.redis.hset(self.key, str(class_id), checkpoint.model_dump_json())
+        self.entries[class_id] = entry
+
+    def leave(self, class_id: int) -> PresenceEntry:
+        self.redis.hdel(self.key, str(class_id))
+        return self.entries.pop(class_id)
@@ -0,0 +1,355 @@
+"""
+Per-frame detection logic shared by the Redis frame stream consumer and the
+single-process pipeline.
+"""
+
+import time
+from collections.abc import Callable, Sequence
+from typing import TYPE_CHECKING
+
+import cv2
+import numpy as np
+import structlog
+from celery.utils.log import get_task_logger
+
+from schrodinger.config import settings
+from schrodinger.detection import warmup
+from schrodinger.detection.assets import frame_hash
+from schrodinger.detection.batching import InferenceBatcher
+from schrodinger.detection.cascade import CascadeDetector
+from schrodinger.detection.detection import (
+    CocoClassId,
+    DetectedEntity,
+    DetectionBox,
+    Detections,
+    EntityDetector,
+    get_watchlist,
+)
+from schrodinger.detection.motion import MotionGate
+from schrodinger.detection.presence import PresenceEntry, PresenceState
+from schrodinger.detection.roi import RegionOfInterest
+from schrodinger.detection.sink import EventSink, PendingEvent
+from schrodinger.detection.stats import DetectorStatsReporter
+from schrodinger.detection.tracking import IoUTracker
+from schrodinger.logging import Logger
+from schrodinger.redis import STREAM_NAME
+from schrodinger.stream.transport import ReceivedFrame
+
+if TYPE_CHECKING:
+    from schrodinger.detection.tasks import DatabaseTask
+
+log: Logger = structlog.wrap_logger(get_task_logger(__name__))
+
+
+def as_bgr(frame: np.ndarray) -> np.ndarray:
+    """
+    Converts a frame ingested with the configured pixel format to BGR.
+    """
+    match settings.STREAM_PIXEL_FORMAT:
+        case "gray":
+            return cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        case "rgb24":
+            return cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        case _:
+            return frame
+
+
+class FrameProcessor:
+    """
+    Runs the motion gate, inference and entered/left events of the watched
+    classes on frames.
+    """
+
+    def __init__(
+        self, task: "DatabaseTask", watchlist: Sequence[CocoClassId] | None = None
+    ):
+        self.task = task
+        # Every watched class has its own entered/left state, all of them are
+        # detected in the same forward pass
+        self.watchlist = list(watchlist) if watchlist is not None else get_watchlist()
+        self.entity_detector = (
+            CascadeDetector(self.watchlist)
+            if settings.DETECTION_CASCADE_ENABLED
+            else EntityDetector(classes=self.watchlist)
+        )
+        self.motion_gate = MotionGate() if settings.MOTION_GATE_ENABLED else None
+        self.tracker = IoUTracker() if settings.TRACKING_ENABLED else None
+        self.presence = PresenceState(task.redis)
+        self.event_sink = EventSink(task)
+        self.presence.restore()
+        self.rois = {
+            camera: RegionOfInterest(polygons)
+            for camera, polygons in settings.DETECTION_ROIS.items()
+        }
+        if settings.WORKER_PRELOAD_MODELS and not warmup.report.warmed_up:
+            # Once per process, when it starts detecting: Celery kills pool
+            # processes whose startup takes more than a few seconds
+            try:
+                warmup.warm_up_models(task.redis)
+            except Exception as e:
+                log.error("Could not warm up detection models", error=e)
+        self.stats_reporter = DetectorStatsReporter(task.redis)
+        self.stats_reporter.record_warmup(
+            warmup.report.load_time, warmup.report.warmup_time
+        )
+        self._cascade_logged_at = 0
+        self.batcher = (
+            InferenceBatcher(self.entity_detector)
+            if settings.DETECTION_BATCH_SIZE > 1
+            else None
+        )
+
+    def close(self) -> None:
+        if self.batcher is not None:
+            self.batcher.close()
+        self.event_sink.close()
+
+    def record_inference(self, latency: float) -> None:
+        self.stats_reporter.record_inference(latency)
+
+        if isinstance(detector := self.entity_detector, CascadeDetector):
+            if detector.stats.frames - self._cascade_logged_at >= 600:
+                self._cascade_logged_at = detector.stats.frames
+                log.info(
+                    "Cascade stats",
+                    stats=detector.stats,
+                    escalation_ratio=f"{detector.stats.escalation_ratio:.2f}",
+                )
+            self.stats_reporter.record_escalation(detector.stats.escalation_ratio)
+
+    def should_infer(self, image: np.ndarray, timestamp: float) -> bool:
+        self.stats_reporter.record_event_sink(
+            self.event_sink.pending, self.event_sink.stats.dropped
+        )
+        self.stats_reporter.flush()
+
+        if (motion_gate := self.motion_gate) is not None:
+            if (motion_gate.stats.frames + 1) % 600 == 0:
+                log.info(
+                    "Motion gate stats",
+                    stats=motion_gate.stats,
+                    skip_ratio=f"{motion_gate.stats.skip_ratio:.2f}",
+                )
+            # The tracker has the last word, the gate keeps its reference
+            # frame unless the detector runs
+            infer = motion_gate.should_infer(image, timestamp, self.tracker_infers)
+            self.stats_reporter.record_motion(
+                motion_gate.last_motion_at, motion_gate.stats.skip_ratio
+            )
+            return infer
+
+        return self.tracker_infers()
+
+    def tracker_infers(self) -> bool:
+        # Between detector runs, tracks carry the presence of the entities
+        return self.tracker is None or self.tracker.next_frame()
+
+    def process(
+        self,
+        image: np.ndarray,
+        timestamp: float,
+        source_size: tuple[int, int] | None = None,
+        is_intact: Callable[[], bool] = lambda: True,
+        camera: str | None = None,
+    ) -> None:
+        """
+        Processes a frame; `is_intact` tells whether its buffer was overwritten
+        during inference, in which case the results are dropped.
+        """
+        roi = self.rois.get(camera) if camera is not None else None
+        inference_frame = roi.crop(image) if roi is not None else image
+        if not self.should_infer(inference_frame, timestamp):
+            return
+
+        inference_started_at = time.perf_counter()
+        results = self.entity_detector.run_inference(as_bgr(inference_frame))
+        self.record_inference(time.perf_counter() - inference_started_at)
+        if not is_intact():
+            log.debug("Frame was overwritten during inference", timestamp=timestamp)
+            return
+
+        self.handle_results(results, as_bgr(image), timestamp, source_size, roi)
+
+    def process_batch(
+        self,
+        frames: list[ReceivedFrame],
+        is_intact: Callable[[ReceivedFrame], bool] = lambda frame: True,
+        stream: str = STREAM_NAME,
+    ) -> None:
+        """
+        Processes frames of a stream in order, with the ones passing the motion
+        gate inferred in a single forward pass. A frame failing does not keep
+        the others from being processed.
+        """
+        if self.batcher is None:
+            for frame in frames:
+                try:
+                    self.process(
+                        frame.image,
+                        frame.timestamp,
+                        source_size=frame.source_size,
+                        is_intact=lambda frame=frame: is_intact(frame),
+                        camera=frame.camera,
+                    )
+                except Exception as e:
+                    log.error(
+                        "Error processing frame", timestamp=frame.timestamp, error=e
+                    )
+            return
+
+        to_infer = []
+        for frame in frames:
+            try:
+                roi = self.rois.get(frame.camera) if frame.camera is not None else None
+                inference_frame = (
+                    roi.crop(frame.image) if roi is not None else frame.image
+                )
+                if self.should_infer(inference_frame, frame.timestamp):
+                    to_infer.append((frame, as_bgr(inference_frame), roi))
+            except Exception as e:
+                log.error("Error processing frame", timestamp=frame.timestamp, error=e)
+        if not to_infer:
+            return
+
+        inference_started_at = time.perf_counter()
+        futures = [
+            self.batcher.submit(stream, frame.seq, inference_frame)
+            for frame, inference_frame, _ in to_infer
+        ]
+        inferred = []
+        for (frame, _, roi), future in zip(to_infer, futures, strict=True):
+            try:
+                inferred.append((frame, roi, future.result()))
+            except Exception as e:
+                log.error("Error inferring frame", timestamp=frame.timestamp, error=e)
+        # Per-frame latency, which is what bounds the sustainable frame rate
+        self.record_inference(
+            (time.perf_counter() - inference_started_at) / len(to_infer)
+        )
+
+        for frame, roi, batch_result in inferred:
+            if not is_intact(frame):
+                log.debug(
+                    "Frame was overwritten during inference", timestamp=frame.timestamp
+                )
+                continue
+
+            try:
+                self.handle_results(
+                    [batch_result.result],
+                    as_bgr(frame.image),
+                    frame.timestamp,
+                    frame.source_size,
+                    roi,
+                )
+            except Exception as e:
+                log.error("Error processing frame", timestamp=frame.timestamp, error=e)
+
+    def extract_detections(
+        self,
+        results,
+        frame: np.ndarray,
+        confidence_threshold: float,
+        source_size: tuple[int, int] | None = None,
+        roi: RegionOfInterest | None = None,
+    ) -> Detections:
+        if roi is None:
+            return self.entity_detector.extract_detections(
+                results, self.watchlist, confidence_threshold, source_size
+            )
+
+        # Boxes come in crop coordinates
+        detections = roi.to_frame(
+            self.entity_detector.extract_detections(
+                results, self.watchlist, confidence_threshold
+            )
+        )
+        if source_size is not None:
+            detections = detections.scaled(
+                (frame.shape[1], frame.shape[0]), source_size
+            )
+        return detections
+
+    def handle_results(
+        self,
+        results,
+        raw_frame: np.ndarray,
+        timestamp: float,
+        source_size: tuple[int, int] | None = None,
+        roi: RegionOfInterest | None = None,
+    ) -> None:
+        if (tracker := self.tracker) is not None:
+            # Low confidence detections keep existing tracks alive
+            tracker.update(
+                self.extract_detections(
+                    results,
+                    raw_frame,
+                    settings.TRACKING_LOW_CONFIDENCE,
+                    source_size,
+                    roi,
+                ),
+                timestamp,
+            )
+            detections = tracker.detections()
+        else:
+            detections = self.extract_detections(
+                results, raw_frame, 0.5, source_size, roi
+            )
+
+        detections = detections.best_per_class()
+        detected = {int(class_id): i for i, class_id in enumerate(detections.class_ids)}
+        if detected:
+            self.stats_reporter.record_activity(timestamp)
+
+        for class_id in self.watchlist:
+            if class_id in detected:
+                if class_id not in self.presence:
+                    entity = detections.entity(detected[class_id])
+                    self.entity_entered(entity, raw_frame, timestamp, source_size)
+            elif class_id in self.presence:
+                # entity was in frame but not anymore
+                self.entity_left(class_id, timestamp)
+
+        # Restored from a checkpoint taken with another watchlist, these are no
+        # longer detected and would otherwise never leave
+        for class_id in [c for c in self.presence.entries if c not in self.watchlist]:
+            self.entity_left(class_id, timestamp)
+
+    def entity_entered(
+        self,
+        entity: DetectedEntity,
+        raw_frame: np.ndarray,
+        timestamp: float,
+        source_size: tuple[int, int] | None = None,
+    ) -> None:
+        # Detach from the frame buffer, which the producer reuses while the
+        # event is being saved
+        raw_frame = raw_frame.copy()
+
+        # Annotations are drawn when the event is viewed, only the box is saved
+        box = DetectionBox.from_entity(
+            entity,
+            source_size
+            if source_size is not None
+            else (raw_frame.shape[1], raw_frame.shape[0]),
+        )
+        # The left event shows the same frame, which is only stored once
+        raw_frame_hash = frame_hash(raw_frame)
+        self.presence.enter(PresenceEntry(entity, raw_frame, box, raw_frame_hash))
+
+        self.event_sink.submit(
+            PendingEvent("entered", timestamp, raw_frame, [box], entity, raw_frame_hash)
+        )
+
+    def entity_left(self, class_id: int, timestamp: float) -> None:
+        entry = self.presence.leave(class_id)
+        self.event_sink.submit(
+            PendingEvent(
+                "left",
+                timestamp,
+                entry.raw_frame,
+                [entry.box] if entry.box is not None else [],
+                entry.entity,
+                entry.frame_hash,
+            )
+        )
@@ -0,0 +1,188 @@
+"""
+INT8 variant of the ONNX models for CPU inference.
+
+The ONNX export is statically quantised with ONNX Runtime, its activation
+ranges calibrated on raw frames of stored events, so the calibration matches
+what our cameras actually see. Stored frames carry no labels: accuracy is
+measured as the agreement with the FP32 torch detections on held-out frames.
+"""
+
+import json
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, field
+
+import cv2
+import numpy as np
+import structlog
+from celery.utils.log import get_task_logger
+from sqlalchemy import func, select
+from ultralytics import YOLO
+from ultralytics.data.augment import LetterBox
+
+from schrodinger.config import settings
+from schrodinger.detection.backends import (
+    ParityReport,
+    check_parity,
+    export_onnx,
+    int8_model_path,
+    weights_path,
+)
+from schrodinger.integrations.aws.s3.service import S3Service
+from schrodinger.kit.db.postgres import SyncSessionMaker
+from schrodinger.logging import Logger
+from schrodinger.models import Event
+
+log: Logger = structlog.wrap_logger(get_task_logger(__name__))
+
+
+def load_event_frames(
+    session_maker: SyncSessionMaker,
+    s3_service: S3Service,
+    limit: int = settings.DETECTION_QUANTIZATION_FRAMES,
+) -> list[np.ndarray]:
+    """
+    Downloads the raw frames of the most recent events.
+    """
+    with session_maker() as session:
+        keys = session.scalars(
+            select(Event.raw_frame_s3_key)
+            .where(Event.raw_frame_s3_key.is_not(None))
+            # Events of the same entity share their frame
+            .group_by(Event.raw_frame_s3_key)
+            .order_by(func.max(Event.timestamp).desc())
+            .limit(limit)
+        ).all()
+
+    frames = []
+    for key in keys:
+        data = s3_service.get_object_or_raise(key)["Body"].read()
+        if (
+            frame := cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        ) is not None:
+            frames.append(frame)
+
+    return frames
+
+
+def preprocess(frame: np.ndarray, imgsz: int) -> np.ndarray:
+    """
+    Same letterboxing and normalisation as ultralytics applies before ONNX
+    inference, as a (1, 3, imgsz, imgsz) float32 RGB tensor.
+    """
+    image = LetterBox((imgsz, imgsz), auto=False)(image=frame)
+    image = np.ascontiguousarray(image[..., ::-1].transpose(2, 0, 1))
+    return (image[None] / 255).astype(np.float32)
+
+
+class EventFrameCalibrationReader:
+    """
+    Feeds calibration frames to ONNX Runtime's static quantisation.
+    """
+
+    def __init__(self, input_name: str, frames: list[np.ndarray], imgsz: int):
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._frames: Iterator[np.ndarray] = iter(frames)
+
+    def get_next(self) -> dict[str, np.ndarray] | None:
+        if (frame := next(self._frames, None)) is None:
+            return None
+        return {self.input_name: preprocess(frame, self.imgsz)}
+
+
+@dataclass
+class QuantizationReport:
+    model: str
+    calibration_frames: int
+    held_out_frames: int
+    # Mean end-to-end prediction latency per held-out frame, in milliseconds
+    latency_ms: dict[str, float] = field(default_factory=dict)
+    # Agreement of the INT8 model with the FP32 torch detections
+    parity: ParityReport = field(default_factory=ParityReport)
+
+
+def mean_latency_ms(model: YOLO, frames: list[np.ndarray], imgsz: int) -> float:
+    # The first call pays for lazy initialisation
+    model(frames[0], imgsz=imgsz, verbose=False)
+
+    started_at = time.perf_counter()
+    for frame in frames:
+        model(frame, imgsz=imgsz, verbose=False)
+    return (time.perf_counter() - started_at) * 1000 / len(frames)
+
+
+def quantize_model(
+    model: str,
+    frames: list[np.ndarray],
+    imgsz: int = settings.DETECTION_INPUT_SIZE,
+    held_out_every: int = 5,
+) -> QuantizationReport:
+    """
+    Writes the INT8 model loaded by the `onnx_int8` backend and reports its
+    accuracy and latency against FP32 on every `held_out_every`th frame, the
+    other ones being used for calibration.
+    """
+    import onnx
+    from onnxruntime.quantization import (
+        CalibrationMethod,
+        QuantFormat,
+        QuantType,
+        quantize_static,
+    )
+
+    held_out = frames[::held_out_every]
+    calibration = [frame for i, frame in enumerate(frames) if i % held_out_every != 0]
+    if not calibration or not held_out:
+        raise ValueError(f"Not enough frames to quantise {model}: {len(frames)}")
+
+    if (onnx_path := export_onnx(model, imgsz)) is None:
+        raise RuntimeError(f"No valid ONNX export of {model} to quantise")
+
+    # Box decoding in the detection head is too sensitive to rounding, it is
+    # left in FP32
+    torch_model = YOLO(weights_path(model))
+    head = f"/model.{torch_model.model.model[-1].i}/"
+    graph = onnx.load(onnx_path).graph
+    int8_path = int8_model_path(model, imgsz)
+
+    log.info(
+        "Quantising model",
+        model=model,
+        calibration_frames=len(calibration),
+        held_out_frames=len(held_out),
+    )
+    quantize_static(
+        onnx_path,
+        int8_path,
+        EventFrameCalibrationReader(graph.input[0].name, calibration, imgsz),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=[
+            node.name for node in graph.node if node.name.startswith(head)
+        ],
+    )
+
+    int8_model = YOLO(int8_path, task="detect")
+    report = QuantizationReport(
+        model=model,
+        calibration_frames=len(calibration),
+        held_out_frames=len(held_out),
+        latency_ms={
+            "torch_fp32": mean_latency_ms(torch_model, held_out, imgsz),
+            "onnx_fp32": mean_latency_ms(
+                YOLO(onnx_path, task="detect"), held_out, imgsz
+            ),
+            "onnx_int8": mean_latency_ms(int8_model, held_out, imgsz),
+        },
+        parity=check_parity(torch_model, int8_model, held_out, imgsz),
+    )
+
+    int8_path.with_suffix(".report.json").write_text(
+        json.dumps(asdict(report), indent=2)
+    )
+    log.info("Quantised model", report=report, passed=report.parity.passed())
+    return report
@@ -0,0 +1,88 @@
+"""
+Regions of interest restricting inference to parts of a camera's view.
+"""
+
+import cv2
+import numpy as np
+
+from schrodinger.detection.detection import Detections
+
+type Polygon = list[tuple[float, float]]
+
+
+class RegionOfInterest:
+    """
+    Crops frames to the bounding region of a camera's polygons and masks out
+    everything else, so inference gets smaller inputs and never sees the parts
+    of the scene we do not care about.
+
+    Polygons are in frame-relative [0, 1] coordinates, which hold at any ingest
+    resolution; their pixel mask is only rebuilt when the frame size changes.
+    """
+
+    def __init__(self, polygons: list[Polygon], fill: int = 114):
+        self.polygons = [
+            np.asarray(polygon, np.float32).reshape(-1, 2) for polygon in polygons
+        ]
+        # Same gray as the letterbox padding of the YOLO preprocessing
+        self.fill = fill
+
+        self.offset = (0, 0)
+        self._frame_size: tuple[int, int] | None = None
+        self._crop: tuple[slice, slice] = (slice(None), slice(None))
+        self._mask = np.empty((0, 0), np.uint8)
+        self._outside = np.empty((0, 0), bool)
+
+    def _prepare(self, width: int, height: int) -> None:
+        if self._frame_size == (width, height):
+            return
+
+        mask = np.zeros((height, width), np.uint8)
+        cv2.fillPoly(
+            mask,
+            [
+                np.round(polygon * (width, height)).astype(np.int32)
+                for polygon in self.polygons
+            ],
+            255,
+        )
+        if (points := cv2.findNonZero(mask)) is None:
+            raise ValueError("Regions of interest do not cover any pixel")
+
+        x, y, w, h = cv2.boundingRect(points)
+        self.offset = (x, y)
+        self._frame_size = (width, height)
+        self._crop = (slice(y, y + h), slice(x, x + w))
+        self._mask = mask[self._crop]
+        self._outside = self._mask == 0
+
+    def crop(self, frame: np.ndarray) -> np.ndarray:
+        self._prepare(frame.shape[1], frame.shape[0])
+
+        cropped = frame[self._crop]
+        if not self._outside.any():
+            return cropped
+
+        cropped = cropped.copy()
+        cropped[self._outside] = self.fill
+        return cropped
+
+    def to_frame(self, detections: Detections) -> Detections:
+        """
+        Maps detections on a crop back to frame coordinates, dropping the ones
+        centred on a masked out area.
+        """
+        height, width = self._mask.shape
+        centre_x = ((detections.xyxy[:, 0] + detections.xyxy[:, 2]) / 2).astype(int)
+        centre_y = ((detections.xyxy[:, 1] + detections.xyxy[:, 3]) / 2).astype(int)
+        inside = (
+            self._mask[centre_y.clip(0, height - 1), centre_x.clip(0, width - 1)] > 0
+        )
+
+        detections = detections.select(inside)
+        return Detections(
+            detections.class_ids,
+            detections.confidences,
+            detections.xyxy + np.tile(np.float32(self.offset), 2),
+            detections.track_ids,
+        )
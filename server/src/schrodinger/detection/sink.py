@@ -0,0 +1,215 @@
+"""
+Background persistence of detection events.
+"""
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import numpy as np
+import structlog
+from celery.utils.log import get_task_logger
+
+from schrodinger.config import settings
+from schrodinger.detection.assets import FrameAssetRegistry
+from schrodinger.detection.detection import DetectedEntity, DetectionBox
+from schrodinger.detection.encoding import ImageEncoder
+from schrodinger.logging import Logger
+from schrodinger.models import Event
+
+if TYPE_CHECKING:
+    from schrodinger.detection.tasks import DatabaseTask
+
+log: Logger = structlog.wrap_logger(get_task_logger(__name__))
+
+
+def save_event(
+    self,
+    event_name: str,
+    timestamp: float,
+    raw_frame: np.ndarray | None,
+    detections: list[DetectionBox],
+    entity: DetectedEntity,
+    assets: FrameAssetRegistry,
+    frame_hash: str | None = None,
+):
+    datetime_str = datetime.fromtimestamp(timestamp)
+    log.info(
+        f"Entity {entity.name} {event_name}",
+        entity_name=entity.name,
+        event_name=event_name,
+        confidence=f"{entity.confidence:.2f}",
+        track_id=entity.track_id,
+        datetime=datetime_str,
+    )
+
+    if raw_frame is not None:
+        raw_frame_s3_key = assets.store(
+            raw_frame, f"{entity.name}_{event_name}_{timestamp}", frame_hash
+        )
+    elif frame_hash is not None:
+        # The frame of the entered event, after a restart
+        raw_frame_s3_key = assets.get(frame_hash)
+    else:
+        raw_frame_s3_key = None
+
+    event = Event(
+        entity_id=entity.class_id,
+        name=entity.name,
+        event_type=event_name,
+        timestamp=datetime_str,
+        track_id=entity.track_id,
+        raw_frame_s3_key=raw_frame_s3_key,
+        detections=[box.model_dump(mode="json") for box in detections],
+    )
+
+    with self.session_maker() as session:
+        session.add(event)
+        session.commit()
+
+
+@dataclass
+class PendingEvent:
+    event_name: str
+    timestamp: float
+    raw_frame: np.ndarray | None
+    # Drawn onto the raw frame when the event is viewed
+    detections: list[DetectionBox]
+    entity: DetectedEntity
+    # Identifies the stored frame, which may be shared with an earlier event
+    frame_hash: str | None = None
+
+
+@dataclass
+class EventSinkStats:
+    submitted: int = 0
+    saved: int = 0
+    retried: int = 0
+    failed: int = 0
+    # Events given up on because the queue stayed full
+    dropped: int = 0
+    # Longest time the detector waited for room in the queue, in seconds
+    max_enqueue_wait: float = 0.0
+
+
+class EventSink:
+    """
+    Saves events from a pool of threads, so the detection loop only enqueues.
+
+    The queue is bounded: when it is full, `submit` waits up to
+    `enqueue_timeout` seconds and then drops the event, so a slow S3 or
+    database backs up into the metrics rather than into inference. Failed
+    saves are retried `max_retries` times with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        task: "DatabaseTask",
+        *,
+        workers: int = settings.EVENT_SINK_WORKERS,
+        max_pending: int = settings.EVENT_SINK_MAX_PENDING,
+        enqueue_timeout: float = settings.EVENT_SINK_ENQUEUE_TIMEOUT,
+        max_retries: int = settings.EVENT_SINK_MAX_RETRIES,
+        retry_backoff: float = settings.EVENT_SINK_RETRY_BACKOFF,
+    ):
+        self.task = task
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.stats = EventSinkStats()
+        self.encoder = ImageEncoder()
+        # The task creates its clients lazily, they are created here rather
+        # than from several threads at once
+        self.assets = FrameAssetRegistry(
+            task.session_maker, task.s3_service, self.encoder
+        )
+
+        self._queue: queue.Queue[PendingEvent] = queue.Queue(max_pending)
+        self._lock = threading.Lock()
+        self._closing = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"EventSink-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, event: PendingEvent) -> bool:
+        started_at = time.perf_counter()
+        try:
+            self._queue.put(event, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self.stats.dropped += 1
+            log.error(
+                "Event sink is full, dropping event",
+                event_name=event.event_name,
+                entity_name=event.entity.name,
+                stats=self.stats,
+            )
+            return False
+        finally:
+            self.stats.max_enqueue_wait = max(
+                self.stats.max_enqueue_wait, time.perf_counter() - started_at
+            )
+
+        self.stats.submitted += 1
+        return True
+
+    def close(self, timeout: float = 30) -> None:
+        """
+        Saves the pending events for up to `timeout` seconds, the threads
+        still saving are then left to exit with the process.
+        """
+        self._closing.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        if any(thread.is_alive() for thread in self._threads):
+            log.warning("Event sink closed with pending events", pending=self.pending)
+
+    def _save(self, event: PendingEvent) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                save_event(
+                    self.task,
+                    event.event_name,
+                    event.timestamp,
+                    event.raw_frame,
+                    event.detections,
+                    entity=event.entity,
+                    assets=self.assets,
+                    frame_hash=event.frame_hash,
+                )
+            except Exception:
+                if attempt == self.max_retries:
+                    with self._lock:
+                        self.stats.failed += 1
+                    log.exception(
+                        "Could not save event",
+                        event_name=event.event_name,
+                        entity_name=event.entity.name,
+                    )
+                    return
+
+                with self._lock:
+                    self.stats.retried += 1
+                time.sleep(self.retry_backoff * 2**attempt)
+            else:
+                with self._lock:
+                    self.stats.saved += 1
+                return
+
+    def _run(self) -> None:
+        while not (self._closing.is_set() and self._queue.empty()):
+            try:
+                event = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._save(event)
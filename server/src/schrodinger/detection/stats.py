@@ -0,0 +1,88 @@
+"""
+Detector statistics shared with the capture side through Redis.
+"""
+
+import time
+from dataclasses import dataclass
+
+from redis import Redis
+
+from schrodinger.redis import DETECTOR_STATS_KEY
+
+
+@dataclass
+class DetectorActivity:
+    # Exponentially weighted average of the inference latency, in seconds
+    inference_latency: float = 0.0
+    # Last time the scene changed or an entity was detected
+    last_activity_at: float = 0.0
+    # Share of frames the motion gate kept away from inference
+    skip_ratio: float = 0.0
+    # Share of frames the cascade detector escalated to the large model
+    escalation_ratio: float = 0.0
+    # Events waiting to be saved, and events dropped because the sink was full
+    event_backlog: float = 0.0
+    events_dropped: float = 0.0
+    # Seconds the worker spent loading and warming up the models at startup
+    model_load_time: float = 0.0
+    model_warmup_time: float = 0.0
+    updated_at: float = 0.0
+
+    @classmethod
+    def from_redis(cls, mapping: dict[bytes, bytes]) -> "DetectorActivity":
+        return cls(
+            **{
+                field: float(mapping[field.encode()])
+                for field in cls.__dataclass_fields__
+                if field.encode() in mapping
+            }
+        )
+
+
+class DetectorStatsReporter:
+    """
+    Accumulates detector activity and writes it to Redis at most once per
+    `flush_interval`, so reporting never adds a round trip per frame.
+    """
+
+    def __init__(self, redis: Redis, flush_interval: float = 1.0, alpha: float = 0.2):
+        self.redis = redis
+        self.flush_interval = flush_interval
+        self.alpha = alpha
+        # The scene counts as idle from when the detector started, not before
+        self.activity = DetectorActivity(last_activity_at=time.time())
+        self._flushed_at = 0.0
+
+    def record_inference(self, latency: float) -> None:
+        if self.activity.inference_latency == 0.0:
+            self.activity.inference_latency = latency
+        else:
+            self.activity.inference_latency += self.alpha * (
+                latency - self.activity.inference_latency
+            )
+
+    def record_activity(self, timestamp: float) -> None:
+        self.activity.last_activity_at = max(self.activity.last_activity_at, timestamp)
+
+    def record_motion(self, last_motion_at: float, skip_ratio: float) -> None:
+        self.record_activity(last_motion_at)
+        self.activity.skip_ratio = skip_ratio
+
+    def record_escalation(self, escalation_ratio: float) -> None:
+        self.activity.escalation_ratio = escalation_ratio
+
+    def record_event_sink(self, backlog: int, dropped: int) -> None:
+        self.activity.event_backlog = backlog
+        self.activity.events_dropped = dropped
+
+    def record_warmup(self, load_time: float, warmup_time: float) -> None:
+        self.activity.model_load_time = load_time
+        self.activity.model_warmup_time = warmup_time
+
+    def flush(self) -> None:
+        now = time.time()
+        if now - self._flushed_at < self.flush_interval:
+            return
+
+        self._flushed_at = self.activity.updated_at = now
+        self.redis.hset(DETECTOR_STATS_KEY, mapping=self.activity.__dict__)
@@ -0,0 +1,181 @@
+"""
+Lightweight multi-object tracker carrying identities between detector runs.
+"""
+
+import itertools
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from schrodinger.config import settings
+from schrodinger.detection.backends import box_iou
+from schrodinger.detection.detection import Detections
+
+
+@dataclass
+class Track:
+    track_id: int
+    class_id: int
+    confidence: float
+    xyxy: np.ndarray  # (4,) float32
+    # Box corners' velocity in pixels per second
+    velocity: np.ndarray = field(default_factory=lambda: np.zeros(4, np.float32))
+    updated_at: float = 0.0
+    hits: int = 1
+    # Detector runs in a row that did not match the track
+    misses: int = 0
+
+
+class IoUTracker:
+    """
+    Associates detections with tracks by IoU, ByteTrack style.
+
+    Detections above `high_confidence` are matched first and may start new
+    tracks; the remaining low confidence ones can only keep unmatched tracks
+    alive, so an object briefly detected with a lower score keeps its identity.
+    A track is dropped after `max_misses` detector runs without a match.
+
+    Presence only changes on detector runs, which are only needed every
+    `detect_every` frames, or on the next frame while a track is uncertain:
+    missed on the last run, or below `uncertain_confidence`. Boxes are
+    propagated with their velocity up to each run before being matched.
+    """
+
+    def __init__(
+        self,
+        *,
+        detect_every: int = settings.TRACKING_DETECT_EVERY,
+        iou_threshold: float = settings.TRACKING_IOU_THRESHOLD,
+        high_confidence: float = 0.5,
+        uncertain_confidence: float = settings.TRACKING_UNCERTAIN_CONFIDENCE,
+        max_misses: int = settings.TRACKING_MAX_MISSES,
+        min_hits: int = settings.TRACKING_MIN_HITS,
+    ):
+        self.detect_every = detect_every
+        self.iou_threshold = iou_threshold
+        self.high_confidence = high_confidence
+        self.uncertain_confidence = uncertain_confidence
+        self.max_misses = max_misses
+        self.min_hits = min_hits
+
+        self.tracks: list[Track] = []
+        self._track_ids = itertools.count(1)
+        self._frames_since_detection = 0
+        self._predicted_at = 0.0
+
+    def next_frame(self) -> bool:
+        """
+        Counts a new frame, returns whether the detector must run on it.
+        """
+        self._frames_since_detection += 1
+        if self._frames_since_detection >= self.detect_every or any(
+            track.misses or track.confidence < self.uncertain_confidence
+            for track in self.tracks
+        ):
+            self._frames_since_detection = 0
+            return True
+        return False
+
+    def predict(self, timestamp: float) -> None:
+        """
+        Moves the tracks to where they should be at `timestamp`.
+        """
+        if (elapsed := timestamp - self._predicted_at) <= 0:
+            return
+
+        for track in self.tracks:
+            track.xyxy = track.xyxy + track.velocity * elapsed
+        self._predicted_at = timestamp
+
+    def _associate(
+        self, tracks: list[Track], detections: Detections
+    ) -> list[tuple[int, int]]:
+        if not tracks or not len(detections):
+            return []
+
+        iou = box_iou(np.stack([track.xyxy for track in tracks]), detections.xyxy)
+        iou[
+            np.array([track.class_id for track in tracks])[:, None]
+            != detections.class_ids[None, :]
+        ] = 0
+
+        # Greedy matching, best overlaps first
+        matches = []
+        matched_tracks, matched_detections = set(), set()
+        for i, j in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+            if iou[i, j] < self.iou_threshold:
+                break
+            if i in matched_tracks or j in matched_detections:
+                continue
+            matches.append((int(i), int(j)))
+            matched_tracks.add(i)
+            matched_detections.add(j)
+        return matches
+
+    def update(self, detections: Detections, timestamp: float) -> None:
+        """
+        Updates the tracks with the detections of a detector run at `timestamp`.
+        """
+        self.predict(timestamp)
+
+        high = detections.confidences >= self.high_confidence
+        high_detections = detections.select(high)
+        low_detections = detections.select(~high)
+
+        matches = self._associate(self.tracks, high_detections)
+        matched = {i for i, _ in matches}
+        unmatched = [track for i, track in enumerate(self.tracks) if i not in matched]
+        low_matches = self._associate(unmatched, low_detections)
+        low_matched = {i for i, _ in low_matches}
+
+        for i, j in matches:
+            self._update_track(self.tracks[i], high_detections, j, timestamp)
+        for i, j in low_matches:
+            self._update_track(unmatched[i], low_detections, j, timestamp)
+        for i, track in enumerate(unmatched):
+            if i not in low_matched:
+                track.misses += 1
+
+        self.tracks = [
+            track for track in self.tracks if track.misses <= self.max_misses
+        ]
+
+        matched_detections = {j for _, j in matches}
+        for j in range(len(high_detections)):
+            if j not in matched_detections:
+                self.tracks.append(
+                    Track(
+                        track_id=next(self._track_ids),
+                        class_id=int(high_detections.class_ids[j]),
+                        confidence=float(high_detections.confidences[j]),
+                        xyxy=high_detections.xyxy[j].copy(),
+                        updated_at=timestamp,
+                    )
+                )
+
+    def _update_track(
+        self, track: Track, detections: Detections, index: int, timestamp: float
+    ) -> None:
+        xyxy = detections.xyxy[index]
+        if (elapsed := timestamp - track.updated_at) > 0:
+            # Box was already propagated to `timestamp`, correct the velocity
+            # by the prediction error, smoothed against detection jitter
+            track.velocity = track.velocity + 0.5 * (xyxy - track.xyxy) / elapsed
+
+        track.xyxy = xyxy.copy()
+        track.confidence = float(detections.confidences[index])
+        track.updated_at = timestamp
+        track.hits += 1
+        track.misses = 0
+
+    def detections(self) -> Detections:
+        """
+        Confirmed tracks as detections carrying their track ids.
+        """
+        tracks = [track for track in self.tracks if track.hits >= self.min_hits]
+        return Detections(
+            np.array([track.class_id for track in tracks], np.int16),
+            np.array([track.confidence for track in tracks], np.float32),
+            np.array([track.xyxy for track in tracks], np.float32).reshape(-1, 4),
+            np.array([track.track_id for track in tracks], np.int32),
+        )
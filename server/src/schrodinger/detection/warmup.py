@@ -0,0 +1,101 @@
+"""
+Loading and warm-up of the detection models.
+
+Loading the weights, setting up the ultralytics predictor and the first
+inferences, which select the kernels, would otherwise be paid by the first
+frames of every detection task. The weights are loaded when a worker starts,
+the inferences run when one of its processes starts detecting.
+"""
+
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import structlog
+from celery.utils.log import get_task_logger
+from redis import Redis
+
+from schrodinger.config import settings
+from schrodinger.detection.backends import preload_model
+from schrodinger.detection.detection import EntityDetector, get_watchlist
+from schrodinger.logging import Logger
+from schrodinger.redis import DETECTOR_STATS_KEY
+from schrodinger.stream.ffmpeg import FrameDimension
+
+log: Logger = structlog.wrap_logger(get_task_logger(__name__))
+
+
+@dataclass
+class WarmupReport:
+    models: list[str] = field(default_factory=list)
+    # Seconds spent loading the models, and running their first inferences
+    load_time: float = 0.0
+    warmup_time: float = 0.0
+    warmed_up: bool = False
+
+
+# Warm-up of the current process
+report = WarmupReport()
+
+
+def detection_models() -> list[str]:
+    models = [settings.DETECTION_MODEL]
+    if settings.DETECTION_CASCADE_ENABLED:
+        models.append(settings.DETECTION_CASCADE_SMALL_MODEL)
+    return models
+
+
+def preload_models() -> WarmupReport:
+    started_at = time.perf_counter()
+    for model in detection_models():
+        preload_model(model)
+
+    report.models = detection_models()
+    report.load_time = time.perf_counter() - started_at
+    log.info(
+        "Loaded detection models", models=report.models, load_time=report.load_time
+    )
+    return report
+
+
+def warm_up_models(
+    redis: Redis, iterations: int = settings.WORKER_WARMUP_ITERATIONS
+) -> WarmupReport:
+    """
+    Runs the preloaded models as the detection tasks do, on a blank frame of
+    the ingest size of a 16:9 stream, and publishes the timings with the
+    detector stats.
+    """
+    # Same gray as the letterbox padding
+    frame = np.full(
+        FrameDimension(1920, 1080)
+        .fit_within(settings.STREAM_INGEST_WIDTH, settings.STREAM_INGEST_HEIGHT, 3)
+        .shape(),
+        114,
+        np.uint8,
+    )
+
+    started_at = time.perf_counter()
+    for model in report.models:
+        detector = EntityDetector(model, classes=get_watchlist())
+        for _ in range(iterations):
+            detector.run_inference(frame)
+        if settings.DETECTION_BATCH_SIZE > 1:
+            detector.run_batch_inference([frame] * settings.DETECTION_BATCH_SIZE)
+
+    report.warmup_time = time.perf_counter() - started_at
+    report.warmed_up = True
+    log.info(
+        "Warmed up detection models",
+        models=report.models,
+        load_time=report.load_time,
+        warmup_time=report.warmup_time,
+    )
+    redis.hset(
+        DETECTOR_STATS_KEY,
+        mapping={
+            "model_load_time": report.load_time,
+            "model_warmup_time": report.warmup_time,
+        },
+    )
+    return report
@@ -1,11 +1,17 @@
+import asyncio
+import mimetypes
 from collections.abc import Sequence
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import RedirectResponse
 
+from schrodinger.config import settings
 from schrodinger.event.schemas import Event as EventSchema
 from schrodinger.event.schemas import EventID
 from schrodinger.event.service import event as event_service
+from schrodinger.event.service import s3_service
 from schrodinger.exceptions import ResourceNotFound
+from schrodinger.integrations.aws.s3.exceptions import S3FileError
 from schrodinger.kit.db.postgres import AsyncSession
 from schrodinger.models.event import Event
 from schrodinger.postgres import get_db_session
@@ -46,3 +52,56 @@ async def get(id: EventID, session: AsyncSession = Depends(get_db_session)) -> E
         raise ResourceNotFound()
 
     return event
+
+
+@router.get(
+    "/{id}/annotated_frame",
+    summary="Get Annotated Event Frame",
+    response_class=Response,
+    responses={
+        200: {"content": {"image/*": {}}, "description": "The annotated frame."},
+        404: EventNotFound,
+    },
+)
+async def get_annotated_frame(
+    id: EventID, session: AsyncSession = Depends(get_db_session)
+) -> Response:
+    """
+    Get the frame of an event with its detections drawn on it.
+    """
+    event = await event_service.get(session, id)
+
+    if event is None:
+        raise ResourceNotFound()
+
+    if event.detections is None:
+        # Saved before annotations were rendered on demand
+        if event.annotated_frame_s3_key is None:
+            raise ResourceNotFound()
+        presigned_url, _ = s3_service.generate_presigned_download_url(
+            path=event.annotated_frame_s3_key,
+            filename=event.annotated_frame_s3_key.split("/")[-1],
+            mime_type=mimetypes.guess_type(event.annotated_frame_s3_key)[0]
+            or "application/octet-stream",
+        )
+        return RedirectResponse(url=presigned_url)
+
+    try:
+        image = await asyncio.to_thread(event_service.render_annotated_frame, event)
+    except S3FileError:
+        raise ResourceNotFound()
+    except ValueError:
+        # The stored frame cannot be decoded
+        raise ResourceNotFound()
+    if image is None:
+        raise ResourceNotFound()
+
+    return Response(
+        content=image.data,
+        media_type=image.mime_type,
+        headers={
+            "Cache-Control": (
+                f"public, max-age={settings.EVENT_ANNOTATION_MAX_AGE}, immutable"
+            )
+        },
+    )
@@ -4,7 +4,7 @@ from typing import Annotated
 from fastapi import Path
 from pydantic import UUID4, Field
 
-from schrodinger.detection.detection import CocoClassId
+from schrodinger.detection.detection import CocoClassId, DetectionBox
 from schrodinger.kit.schemas import IDSchema, Schema
 
 
@@ -20,8 +20,16 @@ class EntityDetectedEvent(BaseEvent):
     event_type: str = Field(description="The type of the event.")
     timestamp: datetime = Field(description="The timestamp of the event.")
     raw_frame_s3_key: str = Field(description="S3 link to the raw event frame")
-    annotated_frame_s3_key: str = Field(
-        description="S3 link to the annotated event frame"
+    annotated_frame_s3_key: str | None = Field(
+        default=None,
+        description="S3 link to the annotated event frame, only set on events "
+        "saved before annotations were rendered on demand",
+    )
+    detections: list[DetectionBox] | None = Field(
+        default=None, description="Detections annotated on the event frame."
+    )
+    track_id: int | None = Field(
+        default=None, description="ID of the tracked object behind the event."
     )
 
 
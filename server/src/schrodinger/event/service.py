@@ -1,7 +1,16 @@
 import uuid
 from collections.abc import Sequence
+from functools import lru_cache
 
+import cv2
+import numpy as np
+
+from schrodinger.config import settings
+from schrodinger.detection.annotation import annotate_frame
+from schrodinger.detection.detection import DetectionBox
+from schrodinger.detection.encoding import EncodedImage, encode_image
 from schrodinger.event.repository import EventRepository
+from schrodinger.integrations.aws.s3.service import S3Service
 from schrodinger.kit.db.postgres import AsyncSession
 from schrodinger.models.event import Event
 
@@ -37,5 +46,33 @@ class EventService:
 
         return event
 
+    def render_annotated_frame(self, event: Event) -> EncodedImage | None:
+        """
+        Draws the detections of an event onto its raw frame. Returns None when
+        the event has no raw frame or no stored detections.
+        """
+        if event.raw_frame_s3_key is None or event.detections is None:
+            return None
+
+        return _render_annotated_frame(
+            event.raw_frame_s3_key,
+            tuple(DetectionBox.model_validate(box) for box in event.detections),
+        )
+
+
+s3_service = S3Service(bucket=settings.S3_FILES_BUCKET_NAME)
+
+
+# Events never change, neither do their renderings
+@lru_cache(maxsize=settings.EVENT_ANNOTATION_CACHE_SIZE)
+def _render_annotated_frame(
+    raw_frame_s3_key: str, detections: tuple[DetectionBox, ...]
+) -> EncodedImage:
+    data = s3_service.get_object_or_raise(raw_frame_s3_key)["Body"].read()
+    if (frame := cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)) is None:
+        raise ValueError(f"Could not decode event frame {raw_frame_s3_key}")
+
+    return encode_image(annotate_frame(frame, detections))
+
 
 event = EventService()
@@ -1,3 +1,5 @@
+import mimetypes
+
 from fastapi import APIRouter
 from fastapi.responses import RedirectResponse
 
@@ -17,6 +19,7 @@ async def get_file(path: str) -> RedirectResponse:
     presigned_url, _ = s3_service.generate_presigned_download_url(
         path=path,
         filename=path.split("/")[-1],
-        mime_type="image/png",
+        # Event frames are stored in the configured image format
+        mime_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
     )
     return RedirectResponse(url=presigned_url)
\ No newline at end of file
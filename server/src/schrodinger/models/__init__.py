@@ -1,4 +1,5 @@
 from schrodinger.kit.db.models import Model
 from schrodinger.models.event import Event
+from schrodinger.models.frame_asset import FrameAsset
 
-__all__ = ["Model", "Event"]
+__all__ = ["Model", "Event", "FrameAsset"]
@@ -1,7 +1,9 @@
 import uuid
 from datetime import datetime
+from typing import Any
 
 from sqlalchemy import TIMESTAMP, UUID, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
 from schrodinger.kit.db.models import Model
@@ -22,3 +24,6 @@ class Event(Model):
     )
     raw_frame_s3_key: Mapped[str] = mapped_column(String(500), nullable=True)
     annotated_frame_s3_key: Mapped[str] = mapped_column(String(500), nullable=True)
+    track_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    # Boxes drawn onto the raw frame on demand, replacing the annotated frame
+    detections: Mapped[list[dict[str, Any]]] = mapped_column(JSONB, nullable=True)
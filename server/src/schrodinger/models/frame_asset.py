@@ -0,0 +1,23 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, UUID, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from schrodinger.kit.db.models import Model
+from schrodinger.kit.utils import utc_now
+
+
+class FrameAsset(Model):
+    __tablename__ = "frame_assets"
+
+    id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    # Hash of the frame's pixels, shared by every event showing that frame
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    s3_key: Mapped[str] = mapped_column(String(500), nullable=False)
+    mime_type: Mapped[str] = mapped_column(String(128), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False, default=utc_now, index=True
+    )
@@ -20,6 +20,9 @@ REDIS_RETRY = Retry(default_backoff(), retries=50)
 ProcessName: TypeAlias = Literal["app", "rate-limit", "worker", "script"]
 
 STREAM_NAME = "frames"
+DETECTOR_STATS_KEY = "detector:stats"
+DETECTOR_PRESENCE_KEY = "detector:presence"
+STREAM_RESOLUTION_KEY = "stream:resolution:{camera}"
 
 
 def create_redis(process_name: ProcessName) -> Redis:
@@ -17,7 +17,7 @@ class FrameCapture:
 
         # Set threading and buffer options to prevent FFmpeg assertion errors
         self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer to prevent lag
-        self.capture.set(cv2.CAP_PROP_FPS, 15)  # Limit FPS to reduce load
+        self.capture.set(cv2.CAP_PROP_FPS, settings.STREAM_FPS_MAX)  # Limit FPS
 
         # Additional settings for real-time streaming
         self.capture.set(
@@ -43,10 +43,11 @@ class FrameCapture:
         return frame
 
     def read_num_frames(self):
-        for _ in range(3):  # Read and discard a few frames to get real-time
-            frame = self.read_frame()
+        # Skip a few frames to get real-time, without converting them to images
+        for _ in range(2):
+            self.capture.grab()
 
-        return frame
+        return self.read_frame()
 
     def annotate_frame(self, frame, box, object_name, confidence):
         annotated_frame = frame.copy()
@@ -83,10 +84,16 @@ class FrameCapture:
 # also acts (partly) like a cv.VideoCapture
 # see https://gist.github.com/crackwitz/15c3910f243a42dcd9d4a40fcdb24e40#file-freshest_camera_frame-py-L117
 class FreshestFrame(threading.Thread):
-    def __init__(self, capture, name="FreshestFrame"):
+    def __init__(self, capture, name="FreshestFrame", lazy=False):
         self.capture = capture
         assert self.capture.isOpened()
 
+        # with lazy=True, frames are only grab()bed from the capture, and
+        # retrieve()d only while a reader is waiting for one, so frames nobody
+        # asks for never pay for colour conversion and copies
+        self.lazy = lazy
+        self.waiting = 0
+
         # this lets the read() method block until there's a new frame
         self.cond = threading.Condition()
 
@@ -119,8 +126,19 @@ class FreshestFrame(threading.Thread):
         counter = 0
         while self.running:
             # block for fresh frame
-            (rv, img) = self.capture.read()
-            assert rv
+            if self.lazy:
+                rv = self.capture.grab()
+                if rv and not self.waiting:
+                    continue
+                (rv, img) = self.capture.retrieve() if rv else (rv, None)
+            else:
+                (rv, img) = self.capture.read()
+            if not rv:
+                # end of stream, wake up readers so they can notice
+                with self.cond:
+                    self.running = False
+                    self.cond.notify_all()
+                break
             counter += 1
 
             # publish the frame
@@ -146,9 +164,14 @@ class FreshestFrame(threading.Thread):
                 if seqnumber < 1:
                     seqnumber = 1
 
-                rv = self.cond.wait_for(
-                    lambda: self.latestnum >= seqnumber, timeout=timeout
-                )
+                self.waiting += 1
+                try:
+                    rv = self.cond.wait_for(
+                        lambda: self.latestnum >= seqnumber or not self.running,
+                        timeout=timeout,
+                    )
+                finally:
+                    self.waiting -= 1
                 if not rv:
                     return (self.latestnum, self.frame)
 
@@ -0,0 +1,133 @@
+"""
+Versioned binary codec for frames sent over the Redis `frames` stream.
+
+An encoded frame is a fixed-size little-endian header followed by the pixel
+payload, either raw or compressed:
+
+    magic "SFRM" | version u8 | compression u8 | dtype u8 | ndim u8
+    | shape u32 x 3 | seq u64 | timestamp f64 | payload
+
+Raw payloads are decoded with `np.frombuffer` over the received bytes, without
+any copy. Unlike pickle, decoding never executes code from the stream.
+"""
+
+import struct
+from dataclasses import dataclass
+from enum import IntEnum
+
+import cv2
+import numpy as np
+
+from schrodinger.config import settings
+
+MAGIC = b"SFRM"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sBBBBIIIQd")
+
+
+class FrameCodecError(Exception): ...
+
+
+class FrameCompression(IntEnum):
+    none = 0
+    jpeg = 1
+    lz4 = 2
+
+
+_DTYPES: dict[int, np.dtype] = {
+    1: np.dtype(np.uint8),
+    2: np.dtype(np.uint16),
+    3: np.dtype(np.float32),
+}
+_DTYPE_CODES = {dtype: code for code, dtype in _DTYPES.items()}
+
+
+@dataclass
+class DecodedFrame:
+    image: np.ndarray
+    seq: int
+    timestamp: float
+
+
+def _lz4():
+    try:
+        import lz4.frame
+    except ImportError as e:
+        raise FrameCodecError(
+            "LZ4 frame compression requires the `lz4` package to be installed"
+        ) from e
+    return lz4.frame
+
+
+def encode_frame(
+    frame: np.ndarray,
+    seq: int,
+    timestamp: float,
+    compression: FrameCompression = FrameCompression[settings.FRAME_CODEC_COMPRESSION],
+    jpeg_quality: int = settings.FRAME_CODEC_JPEG_QUALITY,
+) -> bytes:
+    if (dtype_code := _DTYPE_CODES.get(frame.dtype)) is None:
+        raise FrameCodecError(f"Unsupported frame dtype {frame.dtype}")
+    if not 1 <= frame.ndim <= 3:
+        raise FrameCodecError(f"Unsupported frame shape {frame.shape}")
+
+    if compression == FrameCompression.jpeg:
+        if frame.dtype != np.uint8:
+            raise FrameCodecError("JPEG compression requires uint8 frames")
+        encoded, buffer = cv2.imencode(
+            ".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        )
+        if not encoded:
+            raise FrameCodecError("Could not JPEG encode frame")
+        payload: bytes | memoryview = buffer.data
+    elif compression == FrameCompression.lz4:
+        payload = _lz4().compress(np.ascontiguousarray(frame).data)
+    else:
+        payload = np.ascontiguousarray(frame).data
+
+    shape = (*frame.shape, 0, 0)[:3]
+    header = _HEADER.pack(
+        MAGIC, VERSION, compression, dtype_code, frame.ndim, *shape, seq, timestamp
+    )
+
+    return b"".join((header, payload))
+
+
+def decode_frame(data: bytes) -> DecodedFrame:
+    if len(data) < _HEADER.size:
+        raise FrameCodecError("Truncated frame header")
+
+    magic, version, compression, dtype_code, ndim, *rest = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise FrameCodecError("Not an encoded frame")
+    if version != VERSION:
+        raise FrameCodecError(f"Unsupported frame codec version {version}")
+
+    if (dtype := _DTYPES.get(dtype_code)) is None:
+        raise FrameCodecError(f"Unsupported frame dtype code {dtype_code}")
+    if compression not in FrameCompression:
+        raise FrameCodecError(f"Unsupported frame compression code {compression}")
+    if not 1 <= ndim <= 3:
+        raise FrameCodecError(f"Unsupported frame dimensions {ndim}")
+
+    shape = tuple(rest[:ndim])
+    seq, timestamp = rest[3:]
+    payload = memoryview(data)[_HEADER.size :]
+
+    match FrameCompression(compression):
+        case FrameCompression.none:
+            image = np.frombuffer(payload, dtype=dtype)
+        case FrameCompression.lz4:
+            image = np.frombuffer(_lz4().decompress(payload), dtype=dtype)
+        case FrameCompression.jpeg:
+            image = cv2.imdecode(
+                np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_UNCHANGED
+            )
+            if image is None:
+                raise FrameCodecError("Could not JPEG decode frame")
+
+    if image.size != int(np.prod(shape)):
+        raise FrameCodecError(f"Frame payload does not match shape {shape}")
+
+    return DecodedFrame(image.reshape(shape), seq, timestamp)
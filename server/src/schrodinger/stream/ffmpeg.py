@@ -0,0 +1,287 @@
+"""
+FFmpeg decoding process: command line, stream info and resolution cache.
+"""
+
+import re
+import subprocess
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import IO
+from urllib.parse import urlsplit
+
+from redis import Redis
+
+from schrodinger.config import settings
+from schrodinger.redis import STREAM_RESOLUTION_KEY
+from schrodinger.stream.reader import FrameReader
+from schrodinger.worker.cpu import get_cpu_affinity
+
+PIXEL_FORMAT_CHANNELS = {"bgr24": 3, "rgb24": 3, "gray": 1}
+
+# "[Parsed_scale_1 @ 0x...] w:1920 h:1080 fmt:yuvj420p ... -> w:640 h:360 fmt:bgr24"
+_SCALE_RE = re.compile(r"\] w:(\d+) h:(\d+) .*-> w:(\d+) h:(\d+)")
+# "  Stream #0:0: Video: h264 (Main), yuvj420p(pc, bt709), 1920x1080, 10 fps"
+_VIDEO_STREAM_RE = re.compile(r"Stream #\d+:\d+.*: Video: .*?\b(\d{2,5})x(\d{2,5})\b")
+
+
+@dataclass(frozen=True)
+class FrameDimension:
+    width: int
+    height: int
+    channels: int = 3
+
+    def frame_size(self) -> int:
+        return self.width * self.height * self.channels
+
+    def shape(self) -> tuple[int, int, int]:
+        return (self.height, self.width, self.channels)
+
+    def fit_within(
+        self, max_width: int, max_height: int, channels: int
+    ) -> "FrameDimension":
+        """
+        Largest even-sized dimension keeping the aspect ratio within the bounds.
+
+        A bound of 0 leaves that side unconstrained, the frame is never upscaled.
+        """
+        ratio = min(
+            max_width / self.width if max_width else 1.0,
+            max_height / self.height if max_height else 1.0,
+            1.0,
+        )
+        return FrameDimension(
+            max(2, round(self.width * ratio / 2) * 2),
+            max(2, round(self.height * ratio / 2) * 2),
+            channels,
+        )
+
+
+def get_ingest_dimension(source_dim: FrameDimension) -> FrameDimension:
+    return source_dim.fit_within(
+        settings.STREAM_INGEST_WIDTH,
+        settings.STREAM_INGEST_HEIGHT,
+        PIXEL_FORMAT_CHANNELS[settings.STREAM_PIXEL_FORMAT],
+    )
+
+
+def _scale_filter(ingest_dim: FrameDimension | None) -> str:
+    if ingest_dim is not None:
+        return f"scale={ingest_dim.width}:{ingest_dim.height}:flags=area"
+
+    # Resolution not known yet: let FFmpeg apply the same fit-within rule on
+    # the actual input and report the output size on stderr
+    width = f"'min({settings.STREAM_INGEST_WIDTH},iw)'"
+    height = f"'min({settings.STREAM_INGEST_HEIGHT},ih)'"
+    return (
+        f"scale=w={width if settings.STREAM_INGEST_WIDTH else 'iw'}"
+        f":h={height if settings.STREAM_INGEST_HEIGHT else 'ih'}"
+        ":force_original_aspect_ratio=decrease:force_divisible_by=2:flags=area"
+    )
+
+
+def build_ffmpeg_cmd(
+    rtsp_url: str,
+    ingest_dim: FrameDimension | None,
+    fps: int = settings.STREAM_FPS_MAX,
+    keyframes_only: bool = False,
+    cpu_affinity: list[int] = settings.FFMPEG_CPU_AFFINITY,
+) -> list[str]:
+    # Scaling inside the decoder's filter chain means only ingest-sized frames
+    # ever cross the pipe, the frame transport and the detector's preprocessing
+    video_filters = [_scale_filter(ingest_dim)]
+    if keyframes_only:
+        # The decoder skips every P/B-frame; frames come out at the keyframe
+        # interval and must not be duplicated back up to a constant rate
+        decode_options = ["-skip_frame", "nokey"]
+        output_options = ["-fps_mode", "vfr"]
+    else:
+        decode_options = []
+        output_options = []
+        video_filters.insert(0, f"fps={fps}")
+    pin_options = []
+    if cpu_affinity:
+        # The decoder would otherwise start a thread per core of the host.
+        # Pinned by taskset before FFmpeg starts, all its threads inherit it.
+        decode_options += ["-threads", str(len(cpu_affinity))]
+        pin_options = ["taskset", "-c", ",".join(map(str, cpu_affinity))]
+
+    # fmt: off
+    return [
+        *pin_options,
+        "ffmpeg",
+        "-nostats",
+        "-loglevel", "verbose",  # Reports the scale filter's input and output sizes
+        "-rtsp_transport", "tcp",
+        "-fflags", "nobuffer+discardcorrupt",
+        "-flags", "low_delay",
+        "-analyzeduration", "1",
+        "-probesize", "32",
+        *decode_options,
+        "-i", rtsp_url,
+        "-f", "rawvideo",
+        "-pix_fmt", settings.STREAM_PIXEL_FORMAT,
+        "-an",  # Disable audio
+        "-vf", ",".join(video_filters),
+        *output_options,
+        "-",
+    ]
+    # fmt: on
+
+
+class FFmpegStderrMonitor(threading.Thread):
+    """
+    Drains FFmpeg's stderr and extracts the stream resolution from it.
+
+    Reading stderr continuously also keeps FFmpeg from blocking on a full pipe.
+    The last lines are kept around to explain why a process exited.
+    """
+
+    def __init__(self, stderr: IO[bytes], name: str = "FFmpegStderrMonitor"):
+        self.stderr = stderr
+        self.source_dim: FrameDimension | None = None
+        self.output_dim: FrameDimension | None = None
+        self.lines: deque[str] = deque(maxlen=20)
+        self._output_known = threading.Event()
+
+        super().__init__(name=name, daemon=True)
+
+    def run(self) -> None:
+        channels = PIXEL_FORMAT_CHANNELS[settings.STREAM_PIXEL_FORMAT]
+        try:
+            for raw_line in iter(self.stderr.readline, b""):
+                line = raw_line.decode(errors="replace").rstrip()
+                self.lines.append(line)
+
+                if match := _SCALE_RE.search(line):
+                    in_w, in_h, out_w, out_h = map(int, match.groups())
+                    self.source_dim = FrameDimension(in_w, in_h)
+                    self.output_dim = FrameDimension(out_w, out_h, channels)
+                    self._output_known.set()
+                elif self.source_dim is None and (
+                    match := _VIDEO_STREAM_RE.search(line)
+                ):
+                    self.source_dim = FrameDimension(*map(int, match.groups()))
+        finally:
+            self._output_known.set()
+
+    def wait_for_output(self, timeout: float) -> FrameDimension | None:
+        self._output_known.wait(timeout)
+        return self.output_dim
+
+
+class FFmpegDecoder:
+    """
+    FFmpeg process decoding an RTSP stream into rawvideo frames on its stdout.
+
+    With a known source resolution the output size is pinned and frames can be
+    read right away; otherwise FFmpeg picks it and `start` waits for the size
+    it reports.
+    """
+
+    def __init__(
+        self,
+        rtsp_url: str,
+        source_dim: FrameDimension | None = None,
+        *,
+        fps: int = settings.STREAM_FPS_MAX,
+        keyframes_only: bool = False,
+    ):
+        self.rtsp_url = rtsp_url
+        self.known_source_dim = source_dim
+        self.ingest_dim = get_ingest_dimension(source_dim) if source_dim else None
+        self.fps = fps
+        self.keyframes_only = keyframes_only
+
+        self.process: subprocess.Popen | None = None
+        self.monitor: FFmpegStderrMonitor | None = None
+        self.frame_dim: FrameDimension | None = None
+
+    def start(self, timeout: float = 10) -> FrameReader:
+        self.process = subprocess.Popen(
+            build_ffmpeg_cmd(
+                self.rtsp_url, self.ingest_dim, self.fps, self.keyframes_only
+            ),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+        )
+
+        assert self.process.stdout is not None and self.process.stderr is not None
+        self.monitor = FFmpegStderrMonitor(self.process.stderr)
+        self.monitor.start()
+
+        if (frame_dim := self.ingest_dim) is None and (
+            frame_dim := self.monitor.wait_for_output(timeout)
+        ) is None:
+            raise RuntimeError("Could not detect stream resolution")
+        self.frame_dim = frame_dim
+
+        return FrameReader(self.process.stdout, frame_dim.shape())
+
+    @property
+    def cpu_affinity(self) -> list[int] | None:
+        if self.process is None or self.process.poll() is not None:
+            return None
+        return get_cpu_affinity(self.process.pid)
+
+    @property
+    def detected_source_dim(self) -> FrameDimension | None:
+        return self.monitor.source_dim if self.monitor is not None else None
+
+    @property
+    def source_dim(self) -> FrameDimension:
+        source_dim = self.detected_source_dim or self.known_source_dim or self.frame_dim
+        assert source_dim is not None
+        return source_dim
+
+    def needs_restart(self) -> bool:
+        """
+        Whether the output size was pinned for a resolution the stream lacks.
+
+        Frames stay sliceable since their size is pinned, but the aspect ratio
+        is off until FFmpeg restarts with the detected resolution.
+        """
+        return (
+            self.ingest_dim is not None
+            and self.detected_source_dim is not None
+            and get_ingest_dimension(self.detected_source_dim) != self.ingest_dim
+        )
+
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def stderr_tail(self) -> str:
+        return "\n".join(self.monitor.lines) if self.monitor is not None else ""
+
+    def stop(self, timeout: float = 5) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=timeout)
+
+    def kill(self) -> None:
+        if self.process is not None:
+            self.process.kill()
+
+
+def get_camera_id(rtsp_url: str) -> str:
+    # Never leak the credentials embedded in the URL into Redis keys
+    url = urlsplit(rtsp_url)
+    return f"{url.hostname}:{url.port or 554}{url.path}"
+
+
+def load_stream_resolution(redis: Redis, camera_id: str) -> FrameDimension | None:
+    if (value := redis.get(STREAM_RESOLUTION_KEY.format(camera=camera_id))) is None:
+        return None
+
+    width, height = map(int, value.split(b"x"))
+    return FrameDimension(width, height)
+
+
+def save_stream_resolution(
+    redis: Redis, camera_id: str, source_dim: FrameDimension
+) -> None:
+    redis.set(
+        STREAM_RESOLUTION_KEY.format(camera=camera_id),
+        f"{source_dim.width}x{source_dim.height}",
+    )
@@ -0,0 +1,105 @@
+"""
+Adaptive ingest frame rate and decode mode driven by detector backlog and
+scene activity.
+"""
+
+import math
+import time
+
+from redis import Redis
+
+from schrodinger.config import settings
+from schrodinger.detection.stats import DetectorActivity
+from schrodinger.redis import DETECTOR_STATS_KEY
+
+
+class FrameRateController:
+    """
+    Picks the FFmpeg decode mode from the activity the detector reports.
+
+    The rate drops to `min_fps` once the scene has been idle for `idle_after`
+    seconds, and never exceeds what the detector's inference latency can keep
+    up with, since frames it cannot process are dropped from the stream anyway.
+    After `keyframes_only_after` idle seconds, only keyframes are decoded at
+    all. Raising the rate or leaving keyframe-only mode applies immediately;
+    lowering it waits for `min_change_interval` seconds since the last change
+    so that every restart of the decoder pays off.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        *,
+        min_fps: int = settings.STREAM_FPS_MIN,
+        max_fps: int = settings.STREAM_FPS_MAX,
+        idle_after: float = settings.STREAM_IDLE_AFTER,
+        keyframes_only_after: float = settings.STREAM_KEYFRAMES_ONLY_AFTER,
+        min_change_interval: float = settings.STREAM_FPS_MIN_CHANGE_INTERVAL,
+        check_interval: float = 1.0,
+    ):
+        self.redis = redis
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.idle_after = idle_after
+        self.keyframes_only_after = keyframes_only_after
+        self.min_change_interval = min_change_interval
+        self.check_interval = check_interval
+
+        self.fps = max_fps
+        self.keyframes_only = False
+        self.activity = DetectorActivity()
+        self._checked_at = 0.0
+        self._changed_at = time.time()
+
+    def idle_for(self, now: float) -> float:
+        # Without fresh reports from the detector, or any activity reported by
+        # it, assume the worst case
+        if (
+            now - self.activity.updated_at > self.idle_after
+            or self.activity.last_activity_at == 0.0
+        ):
+            return 0.0
+        return max(0.0, now - self.activity.last_activity_at)
+
+    def target_fps(self, now: float) -> int:
+        fps = self.min_fps if self.idle_for(now) > self.idle_after else self.max_fps
+
+        if self.activity.inference_latency > 0:
+            fps = min(fps, math.floor(1 / self.activity.inference_latency))
+
+        return max(self.min_fps, min(self.max_fps, fps))
+
+    def target_keyframes_only(self, now: float) -> bool:
+        return 0 < self.keyframes_only_after < self.idle_for(now)
+
+    def update(self) -> bool:
+        """
+        Refreshes the decode mode, returns whether the decoder must be restarted.
+        """
+        now = time.time()
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+
+        self.activity = DetectorActivity.from_redis(
+            self.redis.hgetall(DETECTOR_STATS_KEY)
+        )
+        fps = self.target_fps(now)
+        keyframes_only = self.target_keyframes_only(now)
+
+        if fps == self.fps and keyframes_only == self.keyframes_only:
+            return False
+
+        lowering = fps < self.fps or keyframes_only > self.keyframes_only
+        raising = fps > self.fps or keyframes_only < self.keyframes_only
+        if (
+            lowering
+            and not raising
+            and now - self._changed_at < self.min_change_interval
+        ):
+            return False
+
+        self.fps = fps
+        self.keyframes_only = keyframes_only
+        self._changed_at = now
+        return True
@@ -0,0 +1,79 @@
+"""
+Exact-length reader of rawvideo frames from the FFmpeg stdout pipe.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import BinaryIO
+
+import numpy as np
+
+
+@dataclass
+class FrameReaderStats:
+    frames: int = 0
+    bytes: int = 0
+    # readinto calls that blocked longer than the stall threshold
+    stalls: int = 0
+    # incomplete frames discarded to get back onto a frame boundary
+    resyncs: int = 0
+
+
+class FrameReader:
+    """
+    Reads whole frames into a small pool of preallocated buffers.
+
+    Pipes deliver data in chunks much smaller than a frame, so every frame is
+    assembled with as many `readinto` calls as needed; a short read is never
+    mistaken for a frame. A frame returned by `read` is a view over a pooled
+    buffer and stays valid until `pool_size - 1` further reads.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        shape: tuple[int, ...],
+        *,
+        pool_size: int = 2,
+        stall_threshold: float = 1.0,
+    ):
+        self.stream = stream
+        self.shape = shape
+        self.frame_size = int(np.prod(shape))
+        self.stall_threshold = stall_threshold
+        self.stats = FrameReaderStats()
+
+        self._buffers = [bytearray(self.frame_size) for _ in range(pool_size)]
+        self._views = [memoryview(buffer) for buffer in self._buffers]
+        self._frames = [
+            np.frombuffer(buffer, dtype=np.uint8).reshape(shape)
+            for buffer in self._buffers
+        ]
+        self._next = 0
+
+    def read(self) -> np.ndarray | None:
+        """
+        Returns the next frame, or None once the stream reached EOF.
+        """
+        index = self._next
+        view = self._views[index]
+
+        filled = 0
+        while filled < self.frame_size:
+            started_at = time.monotonic()
+            count = self.stream.readinto(view[filled:])
+            if time.monotonic() - started_at > self.stall_threshold:
+                self.stats.stalls += 1
+
+            if not count:
+                if filled:
+                    self.stats.resyncs += 1
+                return None
+
+            filled += count
+
+        self._next = (index + 1) % len(self._buffers)
+        self.stats.frames += 1
+        self.stats.bytes += filled
+
+        return self._frames[index]
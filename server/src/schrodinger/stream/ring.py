@@ -0,0 +1,126 @@
+"""
+Fixed-size ring of frame slots living in POSIX shared memory.
+
+The writer (`fetch_frames`) copies each frame into the next slot and stamps it
+with a sequence number; readers on the same host attach to the segment by name
+and get zero-copy `np.ndarray` views. A slot's sequence number is zeroed while
+it is being written, so a reader can tell whether the view it holds is still
+the frame it was notified about.
+"""
+
+import secrets
+import struct
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+_MAGIC = b"SFRG"
+# magic, generation, slots, height, width, channels
+_HEADER = struct.Struct("<4sQIIII")
+_ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+@dataclass(frozen=True)
+class FrameSlot:
+    slot: int
+    seq: int
+    generation: int
+
+
+class FrameRing:
+    def __init__(self, shm: SharedMemory, *, owner: bool):
+        self.shm = shm
+        self.owner = owner
+
+        magic, generation, slots, height, width, channels = _HEADER.unpack_from(shm.buf)
+        if magic != _MAGIC:
+            raise RuntimeError(f"Shared memory {shm.name} is not a frame ring")
+
+        self.generation: int = generation
+        self.slots: int = slots
+        self.shape: tuple[int, ...] = (height, width, channels)
+
+        seqs_offset = _align(_HEADER.size)
+        timestamps_offset = _align(seqs_offset + slots * 8)
+        frames_offset = _align(timestamps_offset + slots * 8)
+
+        self._seqs = np.ndarray((slots,), np.int64, shm.buf, seqs_offset)
+        self._timestamps = np.ndarray((slots,), np.float64, shm.buf, timestamps_offset)
+        self._frames = np.ndarray(
+            (slots, *self.shape), np.uint8, shm.buf, frames_offset
+        )
+
+        self._next_seq = int(self._seqs.max()) + 1
+
+    @staticmethod
+    def segment_size(slots: int, shape: tuple[int, ...]) -> int:
+        seqs_offset = _align(_HEADER.size)
+        timestamps_offset = _align(seqs_offset + slots * 8)
+        frames_offset = _align(timestamps_offset + slots * 8)
+        return frames_offset + slots * int(np.prod(shape))
+
+    @classmethod
+    def create(cls, name: str, slots: int, shape: tuple[int, int, int]) -> "FrameRing":
+        size = cls.segment_size(slots, shape)
+        try:
+            shm = SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a previous writer that did not shut down cleanly
+            stale = SharedMemory(name, create=False)
+            stale.close()
+            stale.unlink()
+            shm = SharedMemory(name, create=True, size=size)
+
+        shm.buf[:size] = bytes(size)
+        _HEADER.pack_into(shm.buf, 0, _MAGIC, secrets.randbits(63), slots, *shape)
+
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "FrameRing":
+        # Readers must not register the segment with the resource tracker,
+        # otherwise it gets unlinked under the writer's feet when they exit
+        return cls(SharedMemory(name, create=False, track=False), owner=False)
+
+    def write(self, frame: np.ndarray, timestamp: float) -> FrameSlot:
+        seq = self._next_seq
+        self._next_seq += 1
+        slot = seq % self.slots
+
+        self._seqs[slot] = 0
+        np.copyto(self._frames[slot], frame.reshape(self.shape), casting="no")
+        self._timestamps[slot] = timestamp
+        self._seqs[slot] = seq
+
+        return FrameSlot(slot=slot, seq=seq, generation=self.generation)
+
+    def is_current(self, frame_slot: FrameSlot) -> bool:
+        return (
+            frame_slot.generation == self.generation
+            and int(self._seqs[frame_slot.slot]) == frame_slot.seq
+        )
+
+    def read(self, frame_slot: FrameSlot) -> tuple[np.ndarray, float] | None:
+        """
+        Returns a read-only view of the slot, or None if it was already reused.
+
+        The view is only guaranteed intact while `is_current` holds for the slot.
+        """
+        if not self.is_current(frame_slot):
+            return None
+
+        view = self._frames[frame_slot.slot]
+        view.flags.writeable = False
+        return view, float(self._timestamps[frame_slot.slot])
+
+    def close(self) -> None:
+        # Views must be dropped before the underlying mmap can be closed
+        del self._seqs, self._timestamps, self._frames
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
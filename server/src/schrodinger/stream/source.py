@@ -0,0 +1,172 @@
+"""
+In-process frame sources exposing a minimal `cv2.VideoCapture` interface, so
+they can be wrapped by `FreshestFrame`.
+
+`grab` advances the stream and `retrieve` turns the last grabbed frame into an
+image, so frames that end up dropped never pay for conversion and copies.
+"""
+
+import os
+from typing import Protocol
+
+import cv2
+import numpy as np
+import structlog
+from redis import Redis
+
+from schrodinger.config import settings
+from schrodinger.logging import Logger
+from schrodinger.stream.ffmpeg import (
+    FFmpegDecoder,
+    FrameDimension,
+    get_camera_id,
+    get_ingest_dimension,
+    load_stream_resolution,
+    save_stream_resolution,
+)
+
+log: Logger = structlog.get_logger()
+
+
+class FrameSource(Protocol):
+    @property
+    def source_size(self) -> tuple[int, int]: ...
+
+    def isOpened(self) -> bool: ...
+
+    def grab(self) -> bool: ...
+
+    def retrieve(self) -> tuple[bool, np.ndarray | None]: ...
+
+    def read(self) -> tuple[bool, np.ndarray | None]: ...
+
+    def release(self) -> None: ...
+
+
+class FFmpegCapture:
+    """
+    Reads frames from an FFmpeg decoder without leaving the process.
+    """
+
+    def __init__(self, rtsp_url: str, redis: Redis):
+        self.redis = redis
+        self.camera_id = get_camera_id(rtsp_url)
+        source_dim = load_stream_resolution(redis, self.camera_id)
+
+        self.decoder = FFmpegDecoder(rtsp_url, source_dim)
+        try:
+            self.reader = self.decoder.start()
+            self._frame: np.ndarray | None = None
+            log.info(
+                "Started FFmpeg capture",
+                source=source_dim,
+                ingest=self.decoder.frame_dim,
+                cpu_affinity=self.decoder.cpu_affinity,
+            )
+        except BaseException:
+            # FFmpeg may already run, nobody else would stop it
+            self.decoder.kill()
+            raise
+
+    @property
+    def source_size(self) -> tuple[int, int]:
+        source_dim = self.decoder.source_dim
+        return (source_dim.width, source_dim.height)
+
+    def isOpened(self) -> bool:
+        return self.decoder.is_running()
+
+    def grab(self) -> bool:
+        # The pipe delivers decoded frames, only the copy can be skipped here
+        if (frame := self.reader.read()) is None:
+            log.info(
+                "FFmpeg stream ended",
+                stats=self.reader.stats,
+                stderr=self.decoder.stderr_tail(),
+            )
+        self._frame = frame
+        return frame is not None
+
+    def retrieve(self) -> tuple[bool, np.ndarray | None]:
+        if self._frame is None:
+            return False, None
+
+        # Consumers hold on to frames longer than the reader's buffer pool
+        return True, self._frame.copy()
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        return self.retrieve() if self.grab() else (False, None)
+
+    def release(self) -> None:
+        if (detected := self.decoder.detected_source_dim) is not None:
+            save_stream_resolution(self.redis, self.camera_id, detected)
+        self.decoder.kill()
+
+
+class OpenCVCapture:
+    """
+    Reads frames with OpenCV's FFmpeg backend.
+
+    `grab` only demuxes and decodes; colour conversion, downscaling to the
+    ingest resolution and the conversion to the configured pixel format are
+    paid in `retrieve`, for the frames the detector actually wants.
+    """
+
+    def __init__(self, rtsp_url: str):
+        os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS", "rtsp_transport;tcp")
+        self.capture = cv2.VideoCapture(rtsp_url, cv2.CAP_FFMPEG)
+        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        if not self.capture.isOpened():
+            raise RuntimeError("Could not open RTSP stream")
+
+        self.source_dim = FrameDimension(
+            int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        )
+        self.ingest_dim = get_ingest_dimension(self.source_dim)
+        log.info(
+            "Started OpenCV capture", source=self.source_dim, ingest=self.ingest_dim
+        )
+
+    @property
+    def source_size(self) -> tuple[int, int]:
+        return (self.source_dim.width, self.source_dim.height)
+
+    def isOpened(self) -> bool:
+        return self.capture.isOpened()
+
+    def grab(self) -> bool:
+        return self.capture.grab()
+
+    def retrieve(self) -> tuple[bool, np.ndarray | None]:
+        retrieved, frame = self.capture.retrieve()
+        if not retrieved:
+            return False, None
+
+        if (self.ingest_dim.width, self.ingest_dim.height) != self.source_size:
+            frame = cv2.resize(
+                frame,
+                (self.ingest_dim.width, self.ingest_dim.height),
+                interpolation=cv2.INTER_AREA,
+            )
+
+        match settings.STREAM_PIXEL_FORMAT:
+            case "gray":
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            case "rgb24":
+                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+        return True, frame
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        return self.retrieve() if self.grab() else (False, None)
+
+    def release(self) -> None:
+        self.capture.release()
+
+
+def open_frame_source(rtsp_url: str, redis: Redis) -> FrameSource:
+    if settings.STREAM_SOURCE == "opencv":
+        return OpenCVCapture(rtsp_url)
+    return FFmpegCapture(rtsp_url, redis)
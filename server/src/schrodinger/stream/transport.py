@@ -0,0 +1,181 @@
+"""
+Transport of decoded frames from `fetch_frames` to `detect_object`.
+
+Frames always go through the Redis `frames` stream, either inline encoded with
+the frame codec or, with the `shared_memory` transport, as a small notification
+pointing at a slot of a `FrameRing` shared by both processes on the same host.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from enum import StrEnum
+
+import numpy as np
+from redis import Redis
+
+from schrodinger.config import settings
+from schrodinger.redis import STREAM_NAME
+from schrodinger.stream.codec import decode_frame, encode_frame
+from schrodinger.stream.ring import FrameRing, FrameSlot
+
+
+class FrameTransport(StrEnum):
+    redis = "redis"
+    shared_memory = "shared_memory"
+
+
+def ring_name(camera: str | None) -> str:
+    """
+    Name of the shared memory segment of a camera's frames. Camera ids contain
+    slashes, which segment names cannot, they are hashed instead.
+    """
+    if camera is None:
+        return settings.FRAME_RING_NAME
+    digest = hashlib.blake2b(camera.encode(), digest_size=8).hexdigest()
+    return f"{settings.FRAME_RING_NAME}-{digest}"
+
+
+@dataclass
+class ReceivedFrame:
+    image: np.ndarray
+    seq: int
+    timestamp: float
+    # (width, height) of the camera stream before decode-time scaling
+    source_size: tuple[int, int] | None = None
+    slot: FrameSlot | None = None
+    # Camera id of the stream the frame comes from
+    camera: str | None = None
+
+
+class FramePublisher:
+    def __init__(
+        self,
+        redis: Redis,
+        transport: FrameTransport | None = None,
+        camera: str | None = None,
+    ):
+        self.redis = redis
+        self.transport = (
+            transport
+            if transport is not None
+            else FrameTransport(settings.FRAME_TRANSPORT)
+        )
+        self.camera = camera
+        self.ring: FrameRing | None = None
+        self.seq = 0
+
+    def _get_ring(self, shape: tuple[int, int, int]) -> FrameRing:
+        if self.ring is not None and self.ring.shape != shape:
+            self.ring.close()
+            self.ring = None
+
+        if self.ring is None:
+            self.ring = FrameRing.create(
+                ring_name(self.camera), settings.FRAME_RING_SLOTS, shape
+            )
+
+        return self.ring
+
+    def publish(
+        self,
+        frame: np.ndarray,
+        timestamp: float,
+        source_size: tuple[int, int] | None = None,
+    ) -> None:
+        fields: dict[str, bytes | int | float]
+        if self.transport == FrameTransport.shared_memory:
+            frame_slot = self._get_ring(frame.shape).write(frame, timestamp)
+            fields = {
+                "slot": frame_slot.slot,
+                "seq": frame_slot.seq,
+                "generation": frame_slot.generation,
+                "timestamp": timestamp,
+            }
+        else:
+            self.seq += 1
+            fields = {"frame": encode_frame(frame, self.seq, timestamp)}
+
+        if source_size is not None:
+            fields["source_width"], fields["source_height"] = source_size
+        if self.camera is not None:
+            fields["camera"] = self.camera
+
+        # Keep one batch worth of frames around for a detector catching up;
+        # its backlog must be capped exactly, a single frame needs no more
+        # than approximate trimming
+        self.redis.xadd(
+            STREAM_NAME,
+            fields,
+            maxlen=settings.DETECTION_BATCH_SIZE,
+            approximate=settings.DETECTION_BATCH_SIZE == 1,
+        )
+
+    def close(self) -> None:
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+
+class FrameSubscriber:
+    def __init__(self):
+        # Rings of the cameras frames were received from, by name
+        self.rings: dict[str, FrameRing] = {}
+
+    def _get_ring(self, name: str, generation: int) -> FrameRing:
+        if (ring := self.rings.get(name)) is not None and ring.generation != generation:
+            # The writer recreated the ring, e.g. after a resolution change
+            ring.close()
+            ring = None
+
+        if ring is None:
+            self.rings[name] = ring = FrameRing.attach(name)
+
+        return ring
+
+    def receive(self, message_data: dict[bytes, bytes]) -> ReceivedFrame | None:
+        source_size = None
+        if b"source_width" in message_data:
+            source_size = (
+                int(message_data[b"source_width"]),
+                int(message_data[b"source_height"]),
+            )
+
+        camera = message_data[b"camera"].decode() if b"camera" in message_data else None
+
+        if b"frame" in message_data:
+            decoded = decode_frame(message_data[b"frame"])
+            return ReceivedFrame(
+                decoded.image,
+                decoded.seq,
+                decoded.timestamp,
+                source_size,
+                camera=camera,
+            )
+
+        frame_slot = FrameSlot(
+            slot=int(message_data[b"slot"]),
+            seq=int(message_data[b"seq"]),
+            generation=int(message_data[b"generation"]),
+        )
+        ring = self._get_ring(ring_name(camera), frame_slot.generation)
+        if (frame := ring.read(frame_slot)) is None:
+            return None
+
+        image, timestamp = frame
+        return ReceivedFrame(
+            image, frame_slot.seq, timestamp, source_size, frame_slot, camera
+        )
+
+    def is_intact(self, frame: ReceivedFrame) -> bool:
+        """
+        Whether a shared memory frame was not overwritten while being processed.
+        """
+        if frame.slot is None:
+            return True
+        ring = self.rings.get(ring_name(frame.camera))
+        return ring is not None and ring.is_current(frame.slot)
+
+    def close(self) -> None:
+        for ring in self.rings.values():
+            ring.close()
+        self.rings = {}
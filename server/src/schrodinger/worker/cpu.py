@@ -0,0 +1,95 @@
+"""
+CPU threads and affinity of the worker processes.
+
+Torch, OpenCV and the BLAS libraries each start a thread per core by default,
+so several workers or cameras on a host oversubscribe every core and inference
+latency becomes erratic. Thread counts are capped per process and processes
+may be pinned to a subset of the cores.
+"""
+
+import os
+from dataclasses import dataclass
+
+import structlog
+from celery.utils.log import get_task_logger
+
+from schrodinger.config import settings
+from schrodinger.logging import Logger
+
+log: Logger = structlog.wrap_logger(get_task_logger(__name__))
+
+BLAS_THREAD_VARIABLES = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def configure_blas_threads(threads: int = settings.WORKER_BLAS_THREADS) -> None:
+    """
+    BLAS libraries read their thread count once, when they are loaded: this
+    must run before numpy or torch are imported.
+    """
+    if threads > 0:
+        for variable in BLAS_THREAD_VARIABLES:
+            os.environ[variable] = str(threads)
+
+
+def set_cpu_affinity(cpus: list[int], pid: int = 0) -> None:
+    """
+    Pins a process, the current one by default, to `cpus` (empty does nothing,
+    as does a platform without affinity such as macOS or Windows).
+    """
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(pid, cpus)
+
+
+def get_cpu_affinity(pid: int = 0) -> list[int] | None:
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    return sorted(os.sched_getaffinity(pid))
+
+
+@dataclass
+class CpuConfig:
+    pid: int
+    cpu_affinity: list[int] | None
+    torch_threads: int
+    torch_interop_threads: int
+    opencv_threads: int
+    blas_threads: dict[str, str | None]
+
+
+def configure_cpu(
+    *,
+    cpu_affinity: list[int] = settings.WORKER_CPU_AFFINITY,
+    torch_threads: int = settings.WORKER_TORCH_THREADS,
+    torch_interop_threads: int = settings.WORKER_TORCH_INTEROP_THREADS,
+    opencv_threads: int = settings.WORKER_OPENCV_THREADS,
+) -> CpuConfig:
+    """
+    Applies the thread counts and affinity to the current process, which must
+    happen before it runs any inference, and returns the effective ones.
+    """
+    import cv2
+    import torch
+
+    set_cpu_affinity(cpu_affinity)
+
+    if torch_threads > 0:
+        torch.set_num_threads(torch_threads)
+    if torch_interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(torch_interop_threads)
+        except RuntimeError as e:
+            # Can only be set once, before any inter-op parallel work
+            log.warning("Could not set torch inter-op threads", error=e)
+    if opencv_threads > 0:
+        cv2.setNumThreads(opencv_threads)
+
+    return CpuConfig(
+        pid=os.getpid(),
+        cpu_affinity=get_cpu_affinity(),
+        torch_threads=torch.get_num_threads(),
+        torch_interop_threads=torch.get_num_interop_threads(),
+        opencv_threads=cv2.getNumThreads(),
+        blas_threads={
+            variable: os.environ.get(variable) for variable in BLAS_THREAD_VARIABLES
+        },
+    )
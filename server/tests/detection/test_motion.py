@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from schrodinger.detection.motion import MotionGate
+
+
+class MotionGateTest(unittest.TestCase):
+    def setUp(self):
+        self.gate = MotionGate(
+            method="diff",
+            width=64,
+            pixel_threshold=25,
+            sensitivity=0.02,
+            force_interval=5.0,
+        )
+        self.static = np.zeros((72, 128, 3), np.uint8)
+        self.moved = self.static.copy()
+        self.moved[20:50, 40:90] = 255
+
+    def test_first_frame_is_inferred(self):
+        self.assertTrue(self.gate.should_infer(self.static, 0.0))
+
+    def test_skips_static_frames(self):
+        self.gate.should_infer(self.static, 0.0)
+
+        self.assertFalse(self.gate.should_infer(self.static, 1.0))
+        self.assertEqual((self.gate.stats.frames, self.gate.stats.skipped), (2, 1))
+
+    def test_infers_on_motion(self):
+        self.gate.should_infer(self.static, 0.0)
+
+        self.assertTrue(self.gate.should_infer(self.moved, 1.0))
+        self.assertEqual(self.gate.last_motion_at, 1.0)
+        # The moved frame is the new reference
+        self.assertFalse(self.gate.should_infer(self.moved, 2.0))
+
+    def test_forces_inference_after_interval(self):
+        self.gate.should_infer(self.static, 0.0)
+
+        self.assertFalse(self.gate.should_infer(self.static, 4.9))
+        self.assertTrue(self.gate.should_infer(self.static, 5.0))
+        self.assertEqual(self.gate.stats.forced, 1)
+
+    def test_declined_inference_keeps_reference(self):
+        self.gate.should_infer(self.static, 0.0)
+
+        self.assertFalse(self.gate.should_infer(self.moved, 1.0, lambda: False))
+        # Still compared with the static frame, the motion is not lost
+        self.assertTrue(self.gate.should_infer(self.moved, 2.0))
+        self.assertEqual(self.gate.stats.skipped, 0)
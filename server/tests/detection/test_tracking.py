@@ -0,0 +1,96 @@
+import unittest
+from importlib.util import find_spec
+
+import numpy as np
+
+if find_spec("ultralytics") is not None:
+    from schrodinger.detection.detection import Detections
+    from schrodinger.detection.tracking import IoUTracker
+
+
+def _detections(*boxes: tuple[int, float, tuple[float, ...]]) -> "Detections":
+    return Detections(
+        np.array([class_id for class_id, _, _ in boxes], np.int16),
+        np.array([confidence for _, confidence, _ in boxes], np.float32),
+        np.array([xyxy for _, _, xyxy in boxes], np.float32).reshape(-1, 4),
+    )
+
+
+@unittest.skipIf(find_spec("ultralytics") is None, "requires the ultralytics package")
+class IoUTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.tracker = IoUTracker(
+            detect_every=3,
+            iou_threshold=0.3,
+            high_confidence=0.5,
+            uncertain_confidence=0.6,
+            max_misses=2,
+            min_hits=1,
+        )
+
+    def test_keeps_identity_of_overlapping_detections(self):
+        self.tracker.update(_detections((0, 0.9, (10, 10, 50, 50))), 0.0)
+        self.tracker.update(_detections((0, 0.9, (12, 12, 52, 52))), 1.0)
+
+        detections = self.tracker.detections()
+        self.assertEqual(len(detections), 1)
+        self.assertEqual(detections.track_ids.tolist(), [1])
+        np.testing.assert_array_equal(detections.xyxy[0], [12, 12, 52, 52])
+
+    def test_does_not_associate_other_classes(self):
+        self.tracker.update(_detections((0, 0.9, (10, 10, 50, 50))), 0.0)
+        self.tracker.update(_detections((1, 0.9, (10, 10, 50, 50))), 1.0)
+
+        detections = self.tracker.detections()
+        self.assertEqual(sorted(detections.track_ids.tolist()), [1, 2])
+
+    def test_low_confidence_detection_keeps_track_alive(self):
+        self.tracker.update(_detections((0, 0.9, (10, 10, 50, 50))), 0.0)
+        self.tracker.update(_detections((0, 0.3, (11, 11, 51, 51))), 1.0)
+
+        (track,) = self.tracker.tracks
+        self.assertEqual((track.track_id, track.misses), (1, 0))
+
+    def test_low_confidence_detection_starts_no_track(self):
+        self.tracker.update(_detections((0, 0.3, (10, 10, 50, 50))), 0.0)
+
+        self.assertEqual(self.tracker.tracks, [])
+
+    def test_drops_track_after_max_misses(self):
+        self.tracker.update(_detections((0, 0.9, (10, 10, 50, 50))), 0.0)
+        empty = _detections()
+
+        for timestamp in (1.0, 2.0):
+            self.tracker.update(empty, timestamp)
+            self.assertEqual(len(self.tracker.tracks), 1)
+        self.tracker.update(empty, 3.0)
+        self.assertEqual(self.tracker.tracks, [])
+
+    def test_match_resets_misses(self):
+        self.tracker.update(_detections((0, 0.9, (10, 10, 50, 50))), 0.0)
+        self.tracker.update(_detections(), 1.0)
+        self.tracker.update(_detections((0, 0.9, (10, 10, 50, 50))), 2.0)
+
+        (track,) = self.tracker.tracks
+        self.assertEqual((track.misses, track.hits), (0, 2))
+
+    def test_detects_every_nth_frame(self):
+        self.assertEqual(
+            [self.tracker.next_frame() for _ in range(6)],
+            [False, False, True, False, False, True],
+        )
+
+    def test_detects_next_frame_while_uncertain(self):
+        self.tracker.update(_detections((0, 0.9, (10, 10, 50, 50))), 0.0)
+        self.tracker.update(_detections(), 1.0)
+
+        self.assertTrue(self.tracker.next_frame())
+
+    def test_predicts_with_velocity(self):
+        self.tracker.update(_detections((0, 0.9, (10, 10, 50, 50))), 0.0)
+        self.tracker.update(_detections((0, 0.9, (20, 10, 60, 50))), 1.0)
+
+        self.tracker.predict(2.0)
+        (track,) = self.tracker.tracks
+        # Half the first displacement, the velocity being smoothed
+        np.testing.assert_allclose(track.xyxy, [25, 10, 65, 50])
@@ -0,0 +1,83 @@
+import struct
+import unittest
+from importlib.util import find_spec
+
+import numpy as np
+
+from schrodinger.stream.codec import (
+    FrameCodecError,
+    FrameCompression,
+    decode_frame,
+    encode_frame,
+)
+
+# Offsets of the header fields, see the codec's layout
+_COMPRESSION, _DTYPE, _NDIM = 5, 6, 7
+
+
+def _corrupt(data: bytes, offset: int, value: int) -> bytes:
+    return data[:offset] + struct.pack("<B", value) + data[offset + 1 :]
+
+
+class FrameCodecTest(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.frame = rng.integers(0, 256, (36, 64, 3), dtype=np.uint8)
+
+    def test_round_trip(self):
+        for frame in (
+            self.frame,
+            self.frame[..., 0],
+            self.frame.astype(np.uint16),
+            self.frame.astype(np.float32),
+        ):
+            with self.subTest(dtype=frame.dtype, shape=frame.shape):
+                decoded = decode_frame(
+                    encode_frame(frame, 7, 1.5, FrameCompression.none)
+                )
+                np.testing.assert_array_equal(decoded.image, frame)
+                self.assertEqual((decoded.seq, decoded.timestamp), (7, 1.5))
+
+    def test_round_trip_non_contiguous(self):
+        frame = self.frame[::2, ::2]
+        decoded = decode_frame(encode_frame(frame, 1, 0.0, FrameCompression.none))
+        np.testing.assert_array_equal(decoded.image, frame)
+
+    def test_round_trip_jpeg(self):
+        frame = np.full((36, 64, 3), 128, np.uint8)
+        decoded = decode_frame(encode_frame(frame, 1, 0.0, FrameCompression.jpeg))
+        self.assertEqual(decoded.image.shape, frame.shape)
+        self.assertLessEqual(
+            np.abs(decoded.image.astype(int) - frame.astype(int)).max(), 2
+        )
+
+    @unittest.skipIf(find_spec("lz4") is None, "requires the lz4 package")
+    def test_round_trip_lz4(self):
+        decoded = decode_frame(encode_frame(self.frame, 1, 0.0, FrameCompression.lz4))
+        np.testing.assert_array_equal(decoded.image, self.frame)
+
+    def test_unsupported_frames(self):
+        with self.assertRaises(FrameCodecError):
+            encode_frame(self.frame.astype(np.int64), 1, 0.0, FrameCompression.none)
+        with self.assertRaises(FrameCodecError):
+            encode_frame(np.zeros((2, 2, 2, 2), np.uint8), 1, 0.0)
+        with self.assertRaises(FrameCodecError):
+            encode_frame(self.frame.astype(np.float32), 1, 0.0, FrameCompression.jpeg)
+
+    def test_corrupt_headers(self):
+        data = encode_frame(self.frame, 1, 0.0, FrameCompression.none)
+        for name, corrupted in {
+            "truncated": data[:10],
+            "magic": b"XXXX" + data[4:],
+            "version": _corrupt(data, 4, 99),
+            "compression": _corrupt(data, _COMPRESSION, 99),
+            "dtype": _corrupt(data, _DTYPE, 99),
+            "ndim": _corrupt(data, _NDIM, 4),
+            "payload": data[:-1],
+        }.items():
+            with self.subTest(name), self.assertRaises(FrameCodecError):
+                decode_frame(corrupted)
+
+
+if __name__ == "__main__":
+    unittest.main()
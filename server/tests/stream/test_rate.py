@@ -0,0 +1,92 @@
+import time
+import unittest
+from dataclasses import asdict
+from unittest import mock
+
+from schrodinger.detection.stats import DetectorActivity
+from schrodinger.stream.rate import FrameRateController
+
+
+class FrameRateControllerTest(unittest.TestCase):
+    def setUp(self):
+        self.redis = mock.Mock()
+        self.controller = FrameRateController(
+            self.redis,
+            min_fps=2,
+            max_fps=10,
+            idle_after=30.0,
+            keyframes_only_after=60.0,
+            min_change_interval=0.0,
+            check_interval=0.0,
+        )
+
+    def report(self, **activity: float) -> None:
+        """
+        Has the detector report `activity`, just now.
+        """
+        activity.setdefault("updated_at", time.time())
+        stats = DetectorActivity(**activity)
+        self.redis.hgetall.return_value = {
+            field.encode(): str(value).encode()
+            for field, value in asdict(stats).items()
+        }
+
+    def test_stays_at_max_fps_while_active(self):
+        self.report(last_activity_at=time.time())
+
+        self.assertFalse(self.controller.update())
+        self.assertEqual(
+            (self.controller.fps, self.controller.keyframes_only), (10, False)
+        )
+
+    def test_lowers_fps_when_idle(self):
+        self.report(last_activity_at=time.time() - 40)
+
+        self.assertTrue(self.controller.update())
+        self.assertEqual(
+            (self.controller.fps, self.controller.keyframes_only), (2, False)
+        )
+
+    def test_decodes_keyframes_only_when_idle_for_long(self):
+        self.report(last_activity_at=time.time() - 90)
+
+        self.assertTrue(self.controller.update())
+        self.assertEqual(
+            (self.controller.fps, self.controller.keyframes_only), (2, True)
+        )
+
+    def test_raises_on_activity(self):
+        self.report(last_activity_at=time.time() - 90)
+        self.controller.update()
+
+        self.report(last_activity_at=time.time())
+        self.assertTrue(self.controller.update())
+        self.assertEqual(
+            (self.controller.fps, self.controller.keyframes_only), (10, False)
+        )
+
+    def test_caps_fps_by_inference_latency(self):
+        self.report(last_activity_at=time.time(), inference_latency=0.25)
+
+        self.assertTrue(self.controller.update())
+        self.assertEqual(self.controller.fps, 4)
+
+    def test_no_activity_reported_is_not_idle(self):
+        self.report()
+
+        self.assertFalse(self.controller.update())
+        self.assertEqual(
+            (self.controller.fps, self.controller.keyframes_only), (10, False)
+        )
+
+    def test_stale_reports_are_not_idle(self):
+        self.report(last_activity_at=time.time() - 90, updated_at=time.time() - 60)
+
+        self.assertFalse(self.controller.update())
+
+    def test_waits_before_lowering_again(self):
+        self.controller.min_change_interval = 3600.0
+        self.report(last_activity_at=time.time() - 40)
+
+        self.assertFalse(self.controller.update())
+        self.assertEqual(self.controller.fps, 10)
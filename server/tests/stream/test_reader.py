@@ -0,0 +1,70 @@
+import io
+import unittest
+
+import numpy as np
+
+from schrodinger.stream.reader import FrameReader
+
+
+class ChunkedStream(io.RawIOBase):
+    """
+    Pipe-like stream returning at most `chunk_size` bytes per read.
+    """
+
+    def __init__(self, data: bytes, chunk_size: int):
+        self.data = memoryview(data)
+        self.chunk_size = chunk_size
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = min(len(buffer), self.chunk_size, len(self.data) - self.position)
+        buffer[:count] = self.data[self.position : self.position + count]
+        self.position += count
+        return count
+
+
+class FrameReaderTest(unittest.TestCase):
+    shape = (4, 6, 3)
+
+    def setUp(self):
+        self.frames = [np.full(self.shape, value, np.uint8) for value in (1, 2, 3)]
+        self.data = b"".join(frame.tobytes() for frame in self.frames)
+
+    def test_assembles_frames_from_short_reads(self):
+        reader = FrameReader(ChunkedStream(self.data, 5), self.shape)
+
+        for frame in self.frames:
+            np.testing.assert_array_equal(reader.read(), frame)
+        self.assertIsNone(reader.read())
+        self.assertEqual(reader.stats.frames, 3)
+        self.assertEqual(reader.stats.bytes, len(self.data))
+        self.assertEqual(reader.stats.resyncs, 0)
+
+    def test_returns_none_at_eof(self):
+        reader = FrameReader(io.BytesIO(b""), self.shape)
+
+        self.assertIsNone(reader.read())
+        self.assertEqual(reader.stats.frames, 0)
+
+    def test_discards_incomplete_frame_at_eof(self):
+        reader = FrameReader(ChunkedStream(self.data[:-10], 7), self.shape)
+
+        self.assertIsNotNone(reader.read())
+        self.assertIsNotNone(reader.read())
+        self.assertIsNone(reader.read())
+        self.assertEqual(reader.stats.frames, 2)
+        self.assertEqual(reader.stats.resyncs, 1)
+
+    def test_frames_stay_valid_for_the_pool_size(self):
+        reader = FrameReader(io.BytesIO(self.data), self.shape, pool_size=2)
+
+        first = reader.read()
+        second = reader.read()
+        np.testing.assert_array_equal(first, self.frames[0])
+        # The third read reuses the first frame's buffer
+        reader.read()
+        np.testing.assert_array_equal(second, self.frames[1])
+        np.testing.assert_array_equal(first, self.frames[2])
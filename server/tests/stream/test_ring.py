@@ -0,0 +1,55 @@
+import unittest
+import uuid
+
+import numpy as np
+
+from schrodinger.stream.ring import FrameRing, FrameSlot
+
+
+class FrameRingTest(unittest.TestCase):
+    def setUp(self):
+        self.name = f"schrodinger-test-{uuid.uuid4().hex[:8]}"
+        self.writer = FrameRing.create(self.name, 2, (4, 6, 3))
+        self.reader = FrameRing.attach(self.name)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.close()
+
+    def _frame(self, value: int) -> np.ndarray:
+        return np.full((4, 6, 3), value, np.uint8)
+
+    def test_reads_written_frame(self):
+        frame_slot = self.writer.write(self._frame(7), 1.5)
+
+        image, timestamp = self.reader.read(frame_slot)
+        np.testing.assert_array_equal(image, self._frame(7))
+        self.assertEqual(timestamp, 1.5)
+        self.assertFalse(image.flags.writeable)
+
+    def test_detects_overwritten_slot(self):
+        first = self.writer.write(self._frame(1), 1.0)
+        self.writer.write(self._frame(2), 2.0)
+        self.assertTrue(self.reader.is_current(first))
+
+        # Two slots, the third frame reuses the first one's
+        third = self.writer.write(self._frame(3), 3.0)
+        self.assertEqual(third.slot, first.slot)
+        self.assertFalse(self.reader.is_current(first))
+        self.assertIsNone(self.reader.read(first))
+        self.assertIsNotNone(self.reader.read(third))
+
+    def test_rejects_slot_of_another_generation(self):
+        frame_slot = self.writer.write(self._frame(1), 1.0)
+        stale = FrameSlot(frame_slot.slot, frame_slot.seq, frame_slot.generation + 1)
+
+        self.assertFalse(self.reader.is_current(stale))
+
+    def test_recreated_ring_has_new_generation(self):
+        generation = self.writer.generation
+        self.reader.close()
+        self.writer.close()
+
+        self.writer = FrameRing.create(self.name, 2, (4, 6, 3))
+        self.reader = FrameRing.attach(self.name)
+        self.assertNotEqual(self.reader.generation, generation)